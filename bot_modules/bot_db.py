@@ -1,13 +1,28 @@
-import sqlite3
+import threading
 from bot_modules.bot_utilis import get_stock_requirement_columns
-from modules.config import MINIMUM_STOCK_TRANSACTIONS
+from modules.config import DB_NAME, MINIMUM_STOCK_TRANSACTIONS
+from modules.db_helper import connect_db
+
+_local = threading.local()
+
+def get_db():
+    """
+    Returns this thread's long-lived read connection, opening it on first use.
+    Reusing it keeps the page cache and mmap warm and avoids re-running the
+    connection PRAGMAs on every command.
+    """
+    conn = getattr(_local, "conn", None)
+    if conn is None:
+        conn = connect_db(DB_NAME, read_only=True)
+        _local.conn = conn
+    return conn
 
 def get_senators():
     """
     Returns a list of (senator_id, canonical_full_name, state, party),
     sorted by canonical_full_name.
     """
-    conn = sqlite3.connect("filings.db")
+    conn = get_db()
     c = conn.cursor()
     c.execute("""
         SELECT senator_id, canonical_full_name, state, party
@@ -15,7 +30,6 @@ def get_senators():
         ORDER BY canonical_full_name
     """)
     rows = c.fetchall()
-    conn.close()
     return rows
 
 def fetch_matching_senators(partial_name: str) -> list[str]:
@@ -23,7 +37,7 @@ def fetch_matching_senators(partial_name: str) -> list[str]:
     Query up to 25 senator names matching partial_name. We only filter out
     if total_value is NULL. (Or you can remove that filter entirely if you like.)
     """
-    conn = sqlite3.connect("filings.db")
+    conn = get_db()
     c = conn.cursor()
     c.execute("""
         SELECT s.canonical_full_name
@@ -35,7 +49,6 @@ def fetch_matching_senators(partial_name: str) -> list[str]:
         LIMIT 25
     """, (f"%{partial_name}%",))
     rows = c.fetchall()
-    conn.close()
     return [row[0] for row in rows]
 
 def get_senator_analytics(name: str):
@@ -43,7 +56,7 @@ def get_senator_analytics(name: str):
     Return the same 21 columns. If some are NULL, we won't block the entire row.
     We'll do row-based handling in the embed-building function.
     """
-    conn = sqlite3.connect("filings.db")
+    conn = get_db()
     c = conn.cursor()
     c.execute("""
         SELECT
@@ -73,7 +86,7 @@ def get_senator_analytics(name: str):
          WHERE s.canonical_full_name = ?
     """, (name,))
     row = c.fetchone()
-    conn.close()
+    c.close()  # Finish the statement so the shared connection does not hold a read snapshot open.
     return row  # This can contain NULL in some columns.
 
 def get_party_analytics(party_name: str):
@@ -81,7 +94,7 @@ def get_party_analytics(party_name: str):
     Returns a row from analytics_party for the given party name,
     or None if not found. Each row is a 21-column tuple.
     """
-    conn = sqlite3.connect("filings.db")
+    conn = get_db()
     c = conn.cursor()
     c.execute("""
         SELECT 
@@ -110,7 +123,7 @@ def get_party_analytics(party_name: str):
         WHERE party = ?
     """, (party_name,))
     row = c.fetchone()
-    conn.close()
+    c.close()  # Finish the statement so the shared connection does not hold a read snapshot open.
     return row  # None if not found, or a tuple with 21 columns
 
 def fetch_leaderboard(db_column: str) -> list[tuple[str, float]]:
@@ -134,9 +147,8 @@ def fetch_leaderboard(db_column: str) -> list[tuple[str, float]]:
          LIMIT 10
     """
 
-    conn = sqlite3.connect("filings.db")
+    conn = get_db()
     c = conn.cursor()
     c.execute(query)
     rows = c.fetchall()
-    conn.close()
     return rows  # e.g. [("John Doe", 12345.67), ...]
\ No newline at end of file
@@ -1,10 +1,13 @@
+import sys
 import time
-from modules.scraper_filings import scrape_filings
-from modules.scraper_transactions import scrape_transactions
+from modules.scraper_filings import scrape_filings, backfill_filings, needs_filings_backfill
+from modules.scraper_transactions import scrape_transactions, reparse_archived_transactions, check_ptr_parser_parity
 from modules.notify_system import send_unnotified_discord_notifications
 from modules.logger import setup_logger
-from modules.db_helper import init_db, init_analytics_table
+from modules.db_migrations import migrate_database
+from modules.db_helper import init_db, init_analytics_table, init_scrape_state_table, get_scrape_state, set_scrape_state
 from modules.config import DB_NAME, SCRIPT_FREQUENCY_SECONDS
+from modules.deadline import start_cycle, deadline_expired
 from modules.analytics_txmatch import process_transactions_analytics
 from modules.analytics_senators import update_senators_analytics
 from modules.analytics_party import update_party_analytics
@@ -13,43 +16,96 @@ from modules.analytics_party import update_party_analytics
 logger = setup_logger("main_logger", "main.log")
 logger_analytics = setup_logger("analytics", "analytics.log")
 
+# scrape_state keys set while a stage still has to run for new transactions; each is
+# cleared on its own, so an interrupted cycle only resumes the stage that did not finish.
+ANALYTICS_PENDING_KEY = "analytics_pending"
+NOTIFICATIONS_PENDING_KEY = "notifications_pending"
+
 def main():
-    logger.info("[MAIN] Starting scrape_filings")
-    scrape_filings()
+    # Every network call below is bounded by this cycle's remaining budget.
+    start_cycle()
+
+    if needs_filings_backfill():
+        # Fresh database (or unfinished windows from an earlier backfill): fetch history by date window.
+        logger.info("[MAIN] Starting backfill_filings")
+        backfill_filings()
+        time.sleep(2)
+    # Always run the incremental scrape too, so a window that keeps failing cannot hold back new filings.
+    if not deadline_expired("scrape_filings"):
+        logger.info("[MAIN] Starting scrape_filings")
+        scrape_filings()
     time.sleep(2)
 
     logger.info("[MAIN] Starting scrape_transactions")
     scrape_tx = scrape_transactions()
     time.sleep(2)
 
+    conn = init_db(DB_NAME)
+    init_scrape_state_table(conn)
     if scrape_tx:
+        set_scrape_state(conn, ANALYTICS_PENDING_KEY, "1")
+        set_scrape_state(conn, NOTIFICATIONS_PENDING_KEY, "1")
+
+    analytics_pending = get_scrape_state(conn, ANALYTICS_PENDING_KEY) == "1"
+    notifications_pending = get_scrape_state(conn, NOTIFICATIONS_PENDING_KEY) == "1"
+    if (analytics_pending or notifications_pending) and not deadline_expired("analytics & notifications"):
         logger.info("[MAIN] New transactions found. Initializing analytics & notifications.")
 
-        conn = init_db("filings.db") # Rename to DB_NAME constant later after debugging is finished
+        if analytics_pending:
+            logger.info("[MAIN] Starting process_transactions_analytics")
+            finished = process_transactions_analytics(conn)
+            time.sleep(2)
 
-        logger.info("[MAIN] Starting process_transactions_analytics")
-        process_transactions_analytics(conn)
-        time.sleep(2)
+            if finished:
+                logger.info("[MAIN] Starting update_senators_analytics")
+                update_senators_analytics(conn)
+                time.sleep(2)
 
-        logger.info("[MAIN] Starting update_senators_analytics")
-        update_senators_analytics(conn)
-        time.sleep(2)
-        
-        logger.info("[MAIN] Starting update_party_analytics")
-        update_party_analytics(conn)
-        time.sleep(2)
+                logger.info("[MAIN] Starting update_party_analytics")
+                update_party_analytics(conn)
+                time.sleep(2)
 
-        logger.info("[MAIN] Starting send_unnotified_discord_notifications")
-        send_unnotified_discord_notifications()
-        time.sleep(2)
+                # Fresh analytics always owe a notification pass (this also covers state
+                # written before notifications had their own key).
+                set_scrape_state(conn, NOTIFICATIONS_PENDING_KEY, "1")
+                set_scrape_state(conn, ANALYTICS_PENDING_KEY, "")
+                analytics_pending = False
+                notifications_pending = True
+            else:
+                logger.info("[MAIN] Analytics incomplete; they resume next cycle.")
+
+        # Notifications report on the analytics, so they wait until analytics are complete.
+        if notifications_pending and not analytics_pending:
+            logger.info("[MAIN] Starting send_unnotified_discord_notifications")
+            finished = send_unnotified_discord_notifications()
+            time.sleep(2)
 
-    else:
+            if finished:
+                set_scrape_state(conn, NOTIFICATIONS_PENDING_KEY, "")
+            else:
+                logger.info("[MAIN] Notifications incomplete; they resume next cycle.")
+
+    elif not scrape_tx:
         logger.info("[MAIN] No new transactions found. Waiting for next cycle...")
+    conn.close()
 
     # Wait for 3 hour before running the loop again
     time.sleep(SCRIPT_FREQUENCY_SECONDS)
 
 if __name__ == "__main__":
+    # Bring an existing database up to the current schema (columns, indexes) before anything touches it.
+    migrate_database(DB_NAME)
+
+    if "--reparse-archive" in sys.argv:
+        # One-off: rebuild transactions from archived PTR pages (no network), then exit.
+        logger.info("[MAIN] Re-parsing archived PTR pages")
+        reparse_archived_transactions()
+        sys.exit(0)
+    if "--check-parser-parity" in sys.argv:
+        # One-off: compare the lxml and BeautifulSoup parsers on every saved PTR page, then exit.
+        logger.info("[MAIN] Checking PTR parser parity")
+        mismatches = check_ptr_parser_parity()
+        sys.exit(1 if mismatches else 0)
     while True:
         logger.info("Starting loop of main()")
         main()
\ No newline at end of file
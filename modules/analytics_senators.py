@@ -1,7 +1,7 @@
 import sqlite3
 import yfinance as yf
 from datetime import datetime, timedelta
-from modules.utilis import average_amount, get_ignore_tickers
+from modules.utilis import get_ignore_tickers
 import logging
 import time
 from modules.db_helper import init_analytics_table
@@ -202,144 +202,70 @@ def update_senators_analytics_left(conn):
       - count_ownership_joint: Count where owner equals "Joint".
       - count_ownership_self: Count where owner equals "Self".
       - count_ownership_spouse: Count where owner equals "Spouse".
-      - total_transaction_value: Sum of the average amounts extracted from the 'amount'
-            field (using the average_amount helper).
+      - total_transaction_value: Sum of the amount_mid column (midpoint of each amount range).
       - average_transaction_amount: total_transaction_value divided by the number
             of transactions with a valid amount.
     
-    Note: It is assumed that the helper function `average_amount(amount_str)`
-    is available in the scope.
+    All counts and sums are computed by SQLite in one grouped query over every senator.
     """
     c = conn.cursor()
     
-    # Fetch all senator IDs from the senators table.
-    c.execute("SELECT senator_id FROM senators")
-    senator_ids = [row[0] for row in c.fetchall()]
+    # Join transactions with filings (and senators, so only known senators are included).
+    c.execute("""
+        SELECT f.senator_id,
+               COUNT(*),
+               SUM(CASE WHEN t.type = 'Purchase' THEN 1 ELSE 0 END),
+               SUM(CASE WHEN t.type = 'Exchange' THEN 1 ELSE 0 END),
+               SUM(CASE WHEN t.type IN ('Sale', 'Sale (Full)', 'Sale (Partial)') THEN 1 ELSE 0 END),
+               SUM(CASE WHEN t.asset_type = 'Stock' THEN 1 ELSE 0 END),
+               SUM(CASE WHEN t.asset_type = 'Stock' THEN 0 ELSE 1 END),
+               SUM(CASE WHEN t.owner = 'Child' THEN 1 ELSE 0 END),
+               SUM(CASE WHEN t.owner = 'Dependent Child' THEN 1 ELSE 0 END),
+               SUM(CASE WHEN t.owner = 'Joint' THEN 1 ELSE 0 END),
+               SUM(CASE WHEN t.owner = 'Self' THEN 1 ELSE 0 END),
+               SUM(CASE WHEN t.owner = 'Spouse' THEN 1 ELSE 0 END),
+               TOTAL(t.amount_mid),
+               COALESCE(AVG(t.amount_mid), 0)
+        FROM transactions t
+        JOIN filings f ON t.ptr_id = f.ptr_id
+        JOIN senators s ON s.senator_id = f.senator_id
+        GROUP BY f.senator_id
+    """)
+    rows = c.fetchall()
     
-    for senator_id in senator_ids:
-        # Join transactions with filings on ptr_id to get transactions for the senator.
-        c.execute("""
-            SELECT t.type, t.asset_type, t.owner, t.amount
-            FROM transactions t
-            JOIN filings f ON t.ptr_id = f.ptr_id
-            WHERE f.senator_id = ?
-        """, (senator_id,))
-        rows = c.fetchall()
-        
-        # If no transactions exist for this senator, skip updating.
-        if not rows:
-            continue
-        
-        # Initialize counters and accumulators.
-        total_tx_count = 0
-        purchase_count = 0
-        exchange_count = 0
-        sale_count = 0
-        stock_tx_count = 0
-        other_tx_count = 0
-        
-        ownership_child = 0
-        ownership_dependent_child = 0
-        ownership_joint = 0
-        ownership_self = 0
-        ownership_spouse = 0
-        
-        total_transaction_value = 0.0
-        count_valid_amount = 0
-        
-        for row in rows:
-            # Each row contains: (type, asset_type, owner, amount)
-            tx_type, asset_type, owner, amount_str = row
-            total_tx_count += 1
-            
-            # For purchase count, count transactions whose type is one of the given five values.
-            if tx_type == 'Purchase':
-                purchase_count += 1
-                
-            # Count exchange transactions.
-            if tx_type == 'Exchange':
-                exchange_count += 1
-                
-            # Count sale transactions (all sale types).
-            if tx_type in ('Sale', 'Sale (Full)', 'Sale (Partial)'):
-                sale_count += 1
-                
-            # Count stock vs. non-stock transactions.
-            if asset_type == "Stock":
-                stock_tx_count += 1
-            else:
-                other_tx_count += 1
-                
-            # Count ownership types.
-            if owner == "Child":
-                ownership_child += 1
-            if owner == "Dependent Child":
-                ownership_dependent_child += 1
-            if owner == "Joint":
-                ownership_joint += 1
-            if owner == "Self":
-                ownership_self += 1
-            if owner == "Spouse":
-                ownership_spouse += 1
-                
-            # Process the transaction amount using the helper function.
-            # It converts a range (e.g. "$50,001-$100,000") into an average value (e.g. 75000).
-            value = average_amount(amount_str)
-            if value is not None:
-                total_transaction_value += value
-                count_valid_amount += 1
-        
-        average_transaction_amount = (total_transaction_value / count_valid_amount
-                                      if count_valid_amount else 0)
-        
-        # Update the analytics table for the left side fields.
-        c.execute("""
-            INSERT INTO analytics (
-                senator_id,
-                total_transaction_count,
-                total_purchase_count,
-                total_exchange_count,
-                total_sale_count,
-                total_stock_transactions,
-                total_other_transactions,
-                count_ownership_child,
-                count_ownership_dependent_child,
-                count_ownership_joint,
-                count_ownership_self,
-                count_ownership_spouse,
-                total_transaction_value,
-                average_transaction_amount
-            ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
-            ON CONFLICT(senator_id) DO UPDATE SET
-                total_transaction_count = excluded.total_transaction_count,
-                total_purchase_count = excluded.total_purchase_count,
-                total_exchange_count = excluded.total_exchange_count,
-                total_sale_count = excluded.total_sale_count,
-                total_stock_transactions = excluded.total_stock_transactions,
-                total_other_transactions = excluded.total_other_transactions,
-                count_ownership_child = excluded.count_ownership_child,
-                count_ownership_dependent_child = excluded.count_ownership_dependent_child,
-                count_ownership_joint = excluded.count_ownership_joint,
-                count_ownership_self = excluded.count_ownership_self,
-                count_ownership_spouse = excluded.count_ownership_spouse,
-                total_transaction_value = excluded.total_transaction_value,
-                average_transaction_amount = excluded.average_transaction_amount
-        """, (
+    # Update the analytics table for the left side fields.
+    c.executemany("""
+        INSERT INTO analytics (
             senator_id,
-            total_tx_count,
-            purchase_count,
-            exchange_count,
-            sale_count,
-            stock_tx_count,
-            other_tx_count,
-            ownership_child,
-            ownership_dependent_child,
-            ownership_joint,
-            ownership_self,
-            ownership_spouse,
+            total_transaction_count,
+            total_purchase_count,
+            total_exchange_count,
+            total_sale_count,
+            total_stock_transactions,
+            total_other_transactions,
+            count_ownership_child,
+            count_ownership_dependent_child,
+            count_ownership_joint,
+            count_ownership_self,
+            count_ownership_spouse,
             total_transaction_value,
             average_transaction_amount
-        ))
+        ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+        ON CONFLICT(senator_id) DO UPDATE SET
+            total_transaction_count = excluded.total_transaction_count,
+            total_purchase_count = excluded.total_purchase_count,
+            total_exchange_count = excluded.total_exchange_count,
+            total_sale_count = excluded.total_sale_count,
+            total_stock_transactions = excluded.total_stock_transactions,
+            total_other_transactions = excluded.total_other_transactions,
+            count_ownership_child = excluded.count_ownership_child,
+            count_ownership_dependent_child = excluded.count_ownership_dependent_child,
+            count_ownership_joint = excluded.count_ownership_joint,
+            count_ownership_self = excluded.count_ownership_self,
+            count_ownership_spouse = excluded.count_ownership_spouse,
+            total_transaction_value = excluded.total_transaction_value,
+            average_transaction_amount = excluded.average_transaction_amount
+    """, rows)
     conn.commit()
     print("Senators analytics left fields updated successfully.")
 
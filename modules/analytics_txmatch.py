@@ -2,13 +2,19 @@ import sqlite3
 import logging
 import time
 import yfinance as yf
-from datetime import datetime, timedelta
+from datetime import datetime, date, timedelta
 from modules.logger import setup_logger
-from modules.utilis import get_ignore_tickers, average_amount
+from modules.utilis import get_ignore_tickers
+from modules.config import TICKER_HISTORY_MAX_AGE_HOURS
 from modules.db_helper import init_transactions_analytics_table
+from modules.deadline import current_deadline, deadline_expired
 
 logger = logging.getLogger("analytics")
 
+# ticker -> (fetched_at, history DataFrame or None when yfinance had no data). Kept for the
+# life of the process so a fetch cut short by the cycle deadline resumes where it stopped.
+_ticker_history_cache = {}
+
 def setup_match_logger(log_file="debug\matched_transactions.log"):
     """
     Sets up and returns a logger that writes matched transaction info to a file.
@@ -28,6 +34,10 @@ def fetch_all_ticker_histories(conn, overall_start_date, overall_end_date, ignor
     Fetch a dictionary mapping each unique ticker to its historical data
     between overall_start_date and overall_end_date.
     Tickers in the ignore file are skipped.
+    Histories fetched less than TICKER_HISTORY_MAX_AGE_HOURS ago (in this or an earlier
+    cycle) are reused, so only missing or stale tickers hit yfinance.
+    Returns None if the cycle deadline is reached before every ticker was fetched; what
+    was fetched so far stays cached for the next cycle.
     """
     c = conn.cursor()   
     c.execute("""
@@ -42,23 +52,37 @@ def fetch_all_ticker_histories(conn, overall_start_date, overall_end_date, ignor
 
     ticker_histories = {}
     failed_tickers = []
+    fresh_after = datetime.now() - timedelta(hours=TICKER_HISTORY_MAX_AGE_HOURS)
     for ticker in tickers:
         if ticker in ignore_tickers:
             logger.info(f"Ticker {ticker} is in the ignore list. Skipping.")
             continue
+        cached = _ticker_history_cache.get(ticker)
+        if cached and cached[0] >= fresh_after:
+            if cached[1] is None:
+                failed_tickers.append(ticker)
+            else:
+                ticker_histories[ticker] = cached[1]
+            continue
+        if deadline_expired("fetch_all_ticker_histories"):
+            logger.info(f"Fetched {len(ticker_histories)} of {len(tickers)} ticker histories; the rest follow next cycle.")
+            return None
         logger.debug(f"Fetching history for {ticker} from {overall_start_date} to {overall_end_date}")
         stock = yf.Ticker(ticker)
         try:
             hist = stock.history(start=overall_start_date.strftime("%Y-%m-%d"),
                                    end=overall_end_date.strftime("%Y-%m-%d"),
                                    interval="1d",
-                                   actions=False)
+                                   actions=False,
+                                   timeout=current_deadline().request_timeout())
             time.sleep(1)
             if hist.empty:
                 logger.warning(f"No data for {ticker} between {overall_start_date} and {overall_end_date}.")
                 failed_tickers.append(ticker)
+                _ticker_history_cache[ticker] = (datetime.now(), None)
             else:
                 ticker_histories[ticker] = hist
+                _ticker_history_cache[ticker] = (datetime.now(), hist)
         except Exception as e:
             logger.error(f"Error fetching data for {ticker}: {e}")
             failed_tickers.append(ticker)
@@ -105,8 +129,8 @@ def match_transactions(conn):
     The matching criteria are:
       - Transaction type is "purchase" (asset type "Stock")
       - Sale must be for the same ticker and senator, with matching owner (case-insensitive)
-      - Sale date (converted from MM/DD/YYYY using SQLite’s date() function) is greater than the purchase date.
-      - Transactions are sorted chronologically.
+      - Sale date is greater than the purchase date (compared on the ISO date columns).
+      - Transactions are sorted chronologically (transaction_date_iso, served by its index).
       - Each sale (by composite key: ptr_id+txn_num) is used only once.
     Debug logs separate each purchase with a "----------" line and log all candidate sale transactions.
     """
@@ -118,16 +142,14 @@ def match_transactions(conn):
     
     # Retrieve purchase transactions (include owner), sorted chronologically.
     query_purchase = """
-       SELECT f.senator_id, t.ptr_id, t.transaction_number, t.transaction_date, 
-              t.ticker, t.amount, t.owner
+       SELECT f.senator_id, t.ptr_id, t.transaction_number, t.transaction_date, t.transaction_date_iso,
+              t.ticker, t.amount, t.amount_mid, t.owner
        FROM transactions t
        JOIN filings f ON t.ptr_id = f.ptr_id
        WHERE LOWER(t.type) LIKE '%purchase%'
          AND LOWER(t.asset_type) = 'stock'
          AND t.ticker <> '--'
-       ORDER BY date(substr(t.transaction_date,7,4) || '-' ||
-                     substr(t.transaction_date,1,2) || '-' ||
-                     substr(t.transaction_date,4,2)) ASC
+       ORDER BY t.transaction_date_iso ASC
     """
     c.execute(query_purchase)
     purchases = c.fetchall()
@@ -135,12 +157,11 @@ def match_transactions(conn):
     match_logger.info(f"Total purchase transactions: {len(purchases)}")
     
     for purchase in purchases:
-        senator_id, p_ptr, p_txn_num, p_date, ticker, p_amount, p_owner = purchase
-        try:
-            p_date_obj = datetime.strptime(p_date, "%m/%d/%Y").date()
-        except Exception as e:
-            match_logger.error(f"Error converting purchase date '{p_date}' for ptr_id {p_ptr}: {e}")
+        senator_id, p_ptr, p_txn_num, p_date, p_date_iso, ticker, p_amount, p_amount_mid, p_owner = purchase
+        if p_date_iso is None:
+            match_logger.error(f"Unparseable purchase date '{p_date}' for ptr_id {p_ptr}; skipping.")
             continue
+        p_date_obj = date.fromisoformat(p_date_iso)
         
         match_logger.debug("---------- Start Purchase ----------")
         match_logger.debug(
@@ -148,38 +169,34 @@ def match_transactions(conn):
             f"raw date={p_date}, converted={p_date_obj}, ticker={ticker}, amount={p_amount}, owner={p_owner}"
         )
         
-        # Retrieve all sale transactions for this senator and ticker, sorted by date.
+        # Retrieve the later sale transactions for this senator and ticker, sorted by date
+        # (a range scan on idx_transactions_ticker_date_iso).
         query_sale = """
-           SELECT s.ptr_id, s.transaction_number, s.transaction_date, s.owner
+           SELECT s.ptr_id, s.transaction_number, s.transaction_date, s.transaction_date_iso, s.owner
            FROM transactions s
            JOIN filings fs ON s.ptr_id = fs.ptr_id
            WHERE s.ticker = ?
+             AND s.transaction_date_iso > ?
              AND fs.senator_id = ?
              AND LOWER(s.type) LIKE '%sale%'
              AND LOWER(s.asset_type) = 'stock'
              AND s.ticker <> '--'
-           ORDER BY date(substr(s.transaction_date,7,4) || '-' ||
-                          substr(s.transaction_date,1,2) || '-' ||
-                          substr(s.transaction_date,4,2)) ASC
+           ORDER BY s.transaction_date_iso ASC
         """
-        c.execute(query_sale, (ticker, senator_id))
+        c.execute(query_sale, (ticker, p_date_iso, senator_id))
         sales = c.fetchall()
-        match_logger.debug(f"Found {len(sales)} sale transactions for purchase {p_ptr} (ticker {ticker}).")
+        match_logger.debug(f"Found {len(sales)} later sale transactions for purchase {p_ptr} (ticker {ticker}).")
         
         candidate_sales = []
         for sale in sales:
-            s_ptr, s_txn_num, s_date, s_owner = sale
-            try:
-                s_date_obj = datetime.strptime(s_date, "%m/%d/%Y").date()
-            except Exception as e:
-                match_logger.error(f"Error converting sale date '{s_date}' for ptr_id {s_ptr}: {e}")
-                continue
+            s_ptr, s_txn_num, s_date, s_date_iso, s_owner = sale
+            s_date_obj = date.fromisoformat(s_date_iso)
             
             match_logger.debug(
                 f"Sale Candidate: ptr_id={s_ptr}, txn_num={s_txn_num}, raw date={s_date}, "
                 f"converted={s_date_obj}, owner={s_owner}"
             )
-            if s_date_obj > p_date_obj and s_owner.strip().lower() == p_owner.strip().lower():
+            if s_owner.strip().lower() == p_owner.strip().lower():
                 composite_key = (s_ptr, s_txn_num)
                 if composite_key in matched_sale_keys:
                     match_logger.debug(f"Sale {composite_key} already matched; skipping.")
@@ -188,6 +205,7 @@ def match_transactions(conn):
                     "ptr_id": s_ptr,
                     "txn_num": s_txn_num,
                     "transaction_date": s_date,
+                    "transaction_date_iso": s_date_iso,
                     "date_obj": s_date_obj,
                     "owner": s_owner
                 })
@@ -218,8 +236,10 @@ def match_transactions(conn):
                 "ptr_id": p_ptr,
                 "txn_num": p_txn_num,
                 "transaction_date": p_date,
+                "transaction_date_iso": p_date_iso,
                 "ticker": ticker,
                 "amount": p_amount,
+                "amount_mid": p_amount_mid,
                 "owner": p_owner,
                 "date_obj": p_date_obj
             },
@@ -252,12 +272,14 @@ def populate_transactions_analytics_from_matches(conn, matches):
         sale_ptr_id = sale["ptr_id"] if sale else None
         sale_txn_num = sale["txn_num"] if sale else None
         sale_date = sale["transaction_date"] if sale else None
+        sale_date_iso = sale["transaction_date_iso"] if sale else None
         
         c.execute("""
             INSERT OR REPLACE INTO transactions_analytics (
                 purchase_ptr_id, senator_id, purchase_transaction_number, purchase_date,
-                ticker, amount, owner, status, sale_ptr_id, sale_transaction_number, sale_date
-            ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+                ticker, amount, owner, status, sale_ptr_id, sale_transaction_number, sale_date,
+                purchase_date_iso, sale_date_iso, amount_mid
+            ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
         """, (
             purchase["ptr_id"],
             purchase["senator_id"],
@@ -269,7 +291,10 @@ def populate_transactions_analytics_from_matches(conn, matches):
             status,
             sale_ptr_id,
             sale_txn_num,
-            sale_date
+            sale_date,
+            purchase["transaction_date_iso"],
+            sale_date_iso,
+            purchase["amount_mid"]
         ))
     conn.commit()
     print("transactions_analytics table populated successfully.")
@@ -292,19 +317,18 @@ def update_transactions_prices(conn, ticker_histories, max_offset=5):
     c = conn.cursor()
     # Fetch necessary columns from transactions_analytics.
     c.execute("""
-        SELECT purchase_ptr_id, purchase_transaction_number, purchase_date, ticker, status, sale_date
+        SELECT purchase_ptr_id, purchase_transaction_number, purchase_date_iso, ticker, status, sale_date_iso
         FROM transactions_analytics
     """)
     rows = c.fetchall()
     today = datetime.utcnow().date()
     
     for row in rows:
-        purchase_ptr_id, purchase_txn_num, purchase_date_str, ticker, status, sale_date_str = row
-        try:
-            purchase_date = datetime.strptime(purchase_date_str, "%m/%d/%Y").date()
-        except Exception as e:
-            print(f"Error converting purchase_date '{purchase_date_str}' for {purchase_ptr_id}: {e}")
+        purchase_ptr_id, purchase_txn_num, purchase_date_iso, ticker, status, sale_date_iso = row
+        if purchase_date_iso is None:
+            print(f"Missing purchase_date_iso for {purchase_ptr_id}; skipping.")
             continue
+        purchase_date = date.fromisoformat(purchase_date_iso)
         
         # Get price for purchase_date
         price_on_purchase = get_price_from_history(ticker, purchase_date, ticker_histories, max_offset)
@@ -318,12 +342,9 @@ def update_transactions_prices(conn, ticker_histories, max_offset=5):
         price_today = get_price_from_history(ticker, today, ticker_histories, max_offset)
         # Price on sale date, if status is "Closed" and sale_date is present.
         price_on_sale = None
-        if status.strip().lower() == "closed" and sale_date_str:
-            try:
-                sale_date = datetime.strptime(sale_date_str, "%m/%d/%Y").date()
-                price_on_sale = get_price_from_history(ticker, sale_date, ticker_histories, max_offset)
-            except Exception as e:
-                print(f"Error converting sale_date '{sale_date_str}' for {purchase_ptr_id}: {e}")
+        if status.strip().lower() == "closed" and sale_date_iso:
+            sale_date = date.fromisoformat(sale_date_iso)
+            price_on_sale = get_price_from_history(ticker, sale_date, ticker_histories, max_offset)
         
         # Update the row with the new price data.
         c.execute("""
@@ -354,12 +375,12 @@ def update_transactions_analytics_calculations(conn):
       - For status "Open": percent_today, net_profit (using percent_today), and current_value.
       - For status "Closed": percent_on_sale, net_profit (using percent_on_sale), and current_value.
     
-    The average invested is computed via the average_amount() helper using the 'amount' field.
+    The average invested is the amount_mid column (midpoint of the reported amount range).
     If any required field is missing (i.e. price_on_purchase, price_today/price_on_sale), that row is skipped.
     """
     c = conn.cursor()
     c.execute("""
-        SELECT purchase_ptr_id, purchase_transaction_number, status, amount,
+        SELECT purchase_ptr_id, purchase_transaction_number, status, amount_mid,
                price_on_purchase, price_7d, price_30d, price_today, price_on_sale
         FROM transactions_analytics
     """)
@@ -367,7 +388,7 @@ def update_transactions_analytics_calculations(conn):
     updated_count = 0
 
     for row in rows:
-        (purchase_ptr_id, purchase_txn_num, status, amount_str,
+        (purchase_ptr_id, purchase_txn_num, status, avg_invested,
          price_on_purchase, price_7d, price_30d, price_today, price_on_sale) = row
         
         # We require price_on_purchase.
@@ -378,8 +399,7 @@ def update_transactions_analytics_calculations(conn):
         percent_7d = ((price_7d - price_on_purchase) / price_on_purchase * 100) if price_7d is not None else None
         percent_30d = ((price_30d - price_on_purchase) / price_on_purchase * 100) if price_30d is not None else None
         
-        # Use average_amount() to get the average invested value.
-        avg_invested = average_amount(amount_str)
+        # amount_mid is NULL when the amount range could not be parsed.
         if avg_invested is None:
             continue
 
@@ -436,6 +456,7 @@ def process_transactions_analytics(conn):
       - Fetches historical price data for distinct tickers.
       - Updates each transaction row with price data.
       - Calculates additional metrics (percentages, net profit, current value).
+    Returns False if the cycle deadline stopped it before prices were updated.
     """
     init_transactions_analytics_table(conn)
     
@@ -453,6 +474,11 @@ def process_transactions_analytics(conn):
     print("Overall Start Date:", overall_start_date)
     print("Overall End Date:", overall_end_date)
     ticker_histories = fetch_all_ticker_histories(conn, overall_start_date, overall_end_date)
+    if ticker_histories is None:
+        # Partial histories would overwrite known prices with None; the fetched ones are cached
+        # and the remaining tickers are fetched next cycle.
+        logger.warning("Price history fetch stopped at the cycle deadline; analytics resume next cycle.")
+        return False
     for ticker, hist in ticker_histories.items():
         print(f"{ticker}: {hist.shape[0]} rows")
     
@@ -462,4 +488,5 @@ def process_transactions_analytics(conn):
     
     # Update the transactions_analytics table with calculated percentage and net profit values.
     update_transactions_analytics_calculations(conn)
-    print("Calculated values updated successfully.")
\ No newline at end of file
+    print("Calculated values updated successfully.")
+    return True
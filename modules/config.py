@@ -19,12 +19,57 @@ SUBSCRIBE_VIP_ROLE_ID = int(os.getenv("SUBSCRIBE_VIP_ROLE_ID"))
 SUBSCRIBE_LIFETIME_ROLE_ID = int(os.getenv("SUBSCRIBE_LIFETIME_ROLE_ID"))
 SUBSCRIBE_INFO_CHANNEL_ID = int(os.getenv("SUBSCRIBE_INFO_CHANNEL_ID"))
 SCRIPT_FREQUENCY_SECONDS = int(os.getenv("SCRIPT_FREQUENCY_SECONDS"))
+DB_WRITER_QUEUE_SIZE = int(os.getenv("DB_WRITER_QUEUE_SIZE", "64"))
+DB_WRITER_BATCH_SIZE = int(os.getenv("DB_WRITER_BATCH_SIZE", "50"))
+DB_WRITER_FLUSH_SECONDS = float(os.getenv("DB_WRITER_FLUSH_SECONDS", "0.5"))
+CYCLE_BUDGET_SECONDS = int(os.getenv("CYCLE_BUDGET_SECONDS", "3600"))  # 0 disables the deadline
+TICKER_HISTORY_MAX_AGE_HOURS = float(os.getenv("TICKER_HISTORY_MAX_AGE_HOURS", "24"))
 MINIMUM_STOCK_TRANSACTIONS = int(os.getenv("MINIMUM_STOCK_TRANSACTIONS"))
 KOFI_SHOP_STORE_LINK = os.getenv("KOFI_SHOP_STORE_LINK")
 DB_NAME = os.getenv("DB_NAME", "filings.db")  # Provide a default fallback if not found
+SQLITE_JOURNAL_MODE = os.getenv("SQLITE_JOURNAL_MODE", "WAL")
+SQLITE_SYNCHRONOUS = os.getenv("SQLITE_SYNCHRONOUS", "NORMAL")
+SQLITE_MMAP_SIZE = int(os.getenv("SQLITE_MMAP_SIZE", str(256 * 1024 * 1024)))
+SQLITE_CACHE_SIZE_KB = int(os.getenv("SQLITE_CACHE_SIZE_KB", "65536"))
+SQLITE_BUSY_TIMEOUT_MS = int(os.getenv("SQLITE_BUSY_TIMEOUT_MS", "10000"))
+SQLITE_TEMP_STORE = os.getenv("SQLITE_TEMP_STORE", "MEMORY")
 USE_DATE_FILTER = os.getenv("USE_DATE_FILTER", "False").lower() == "true"
 DATE_FILTER_DAYS = int(os.getenv("DATE_FILTER_DAYS", "7"))
-PROXY = os.getenv("PROXY")
+USE_INCREMENTAL_SCRAPE = os.getenv("USE_INCREMENTAL_SCRAPE", "True").lower() == "true"
+INCREMENTAL_LOOKBACK_DAYS = int(os.getenv("INCREMENTAL_LOOKBACK_DAYS", "30"))
+FILINGS_FETCH_WORKERS = int(os.getenv("FILINGS_FETCH_WORKERS", "4"))
+FILINGS_REQUESTS_PER_SECOND = float(os.getenv("FILINGS_REQUESTS_PER_SECOND", "2"))
+BACKFILL_WINDOW_MONTHS = int(os.getenv("BACKFILL_WINDOW_MONTHS", "3"))
+BACKFILL_WINDOW_WORKERS = int(os.getenv("BACKFILL_WINDOW_WORKERS", "4"))
+ALIAS_AUTO_MATCH_CONFIDENCE = float(os.getenv("ALIAS_AUTO_MATCH_CONFIDENCE", "0.9"))
+PROXY = os.getenv("PROXY")  # legacy single proxy; ignored unless USE_LEGACY_PROXY is set
+USE_LEGACY_PROXY = os.getenv("USE_LEGACY_PROXY", "False").lower() == "true"
+PROXIES = [proxy.strip() for proxy in os.getenv("PROXIES", (PROXY or "") if USE_LEGACY_PROXY else "").split(",") if proxy.strip()]
+PROXY_REQUESTS_PER_SECOND = float(os.getenv("PROXY_REQUESTS_PER_SECOND", "2"))
+PROXY_EJECT_AFTER_FAILURES = int(os.getenv("PROXY_EJECT_AFTER_FAILURES", "3"))
+PROXY_MIN_HEALTH = float(os.getenv("PROXY_MIN_HEALTH", "0.3"))
+PROXY_EJECT_SECONDS = float(os.getenv("PROXY_EJECT_SECONDS", "300"))
+HTTP_CASSETTE_MODE = os.getenv("HTTP_CASSETTE_MODE", "off").lower()  # off, record or replay
+HTTP_CASSETTE_DIR = os.getenv("HTTP_CASSETTE_DIR", "cassettes")
+EFD_COOKIE_FILE = os.getenv("EFD_COOKIE_FILE", "efdsearch_cookies.json")
+PTR_PARSER = os.getenv("PTR_PARSER", "lxml").lower()  # lxml (fast path) or bs4
+PTR_FETCH_WORKERS = int(os.getenv("PTR_FETCH_WORKERS", "4"))
+PTR_MAX_PER_HOST = int(os.getenv("PTR_MAX_PER_HOST", "2"))
+PTR_REQUESTS_PER_SECOND = float(os.getenv("PTR_REQUESTS_PER_SECOND", "2"))
+PTR_ARCHIVE_ENABLED = os.getenv("PTR_ARCHIVE_ENABLED", "True").lower() == "true"
+PTR_ARCHIVE_DIR = os.getenv("PTR_ARCHIVE_DIR", "ptr_archive")
+PTR_PARSE_WORKERS = int(os.getenv("PTR_PARSE_WORKERS", str(os.cpu_count() or 1)))  # 0 parses in-process
+PTR_RETRY_BASE_HOURS = float(os.getenv("PTR_RETRY_BASE_HOURS", "6"))
+PTR_RETRY_MAX_HOURS = float(os.getenv("PTR_RETRY_MAX_HOURS", "168"))
+PTR_MAX_ATTEMPTS = int(os.getenv("PTR_MAX_ATTEMPTS", "8"))
+HTTP_POOL_SIZE = int(os.getenv("HTTP_POOL_SIZE", str(max(FILINGS_FETCH_WORKERS, BACKFILL_WINDOW_WORKERS, PTR_FETCH_WORKERS))))
+HTTP_TIMEOUT_SECONDS = float(os.getenv("HTTP_TIMEOUT_SECONDS", "30"))
+HTTP_MAX_RETRIES = int(os.getenv("HTTP_MAX_RETRIES", "3"))
+HTTP_BACKOFF_FACTOR = float(os.getenv("HTTP_BACKOFF_FACTOR", "1"))
+HTTP_BACKOFF_JITTER = float(os.getenv("HTTP_BACKOFF_JITTER", "1"))
+HTTP_BACKOFF_MAX = float(os.getenv("HTTP_BACKOFF_MAX", "30"))
+CIRCUIT_FAILURE_THRESHOLD = int(os.getenv("CIRCUIT_FAILURE_THRESHOLD", "5"))
+CIRCUIT_RESET_SECONDS = float(os.getenv("CIRCUIT_RESET_SECONDS", "120"))
 
 # Retrieve the environment variables for allowed roles
 allowed_role_ids_str = os.getenv("ALLOWED_ROLE_IDS", "")
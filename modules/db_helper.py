@@ -1,15 +1,51 @@
 import sqlite3
 import datetime
+import json
 import logging
-from modules.config import DB_NAME
+from modules.config import (
+    DB_NAME,
+    SQLITE_JOURNAL_MODE,
+    SQLITE_SYNCHRONOUS,
+    SQLITE_MMAP_SIZE,
+    SQLITE_CACHE_SIZE_KB,
+    SQLITE_BUSY_TIMEOUT_MS,
+    SQLITE_TEMP_STORE
+)
+from modules.utilis import to_iso_date, parse_amount_range
 
 # Get the main_logger object
 logger = logging.getLogger("main_logger")
 
 # Basic DB Functions
 
+def connect_db(db_name=DB_NAME, read_only=False, **kwargs):
+    """
+    Opens a SQLite connection with the shared tuning profile from config:
+      - journal_mode (WAL): readers (the bot) never block the pipeline's writer and vice versa
+      - synchronous (NORMAL): fsync at checkpoints only, still crash-safe under WAL
+      - mmap_size, cache_size: keep hot pages in memory across queries
+      - busy_timeout: wait for a lock instead of failing with "database is locked"
+      - temp_store: sorts and temp indexes in memory
+    read_only skips the journal_mode switch: WAL is stored in the database file, so
+    the pipeline's connections set it once and readers simply inherit it.
+    Extra keyword arguments go to sqlite3.connect (e.g. isolation_level).
+    Every connection to the database should be opened through here.
+    """
+    conn = sqlite3.connect(db_name, timeout=SQLITE_BUSY_TIMEOUT_MS / 1000, **kwargs)
+    conn.execute(f"PRAGMA busy_timeout = {int(SQLITE_BUSY_TIMEOUT_MS)}")
+    if not read_only:
+        journal_mode = conn.execute(f"PRAGMA journal_mode = {SQLITE_JOURNAL_MODE}").fetchone()[0]
+        if journal_mode.lower() != SQLITE_JOURNAL_MODE.lower():
+            logger.warning(f"Could not switch {db_name} to journal_mode={SQLITE_JOURNAL_MODE}; using {journal_mode}.")
+    conn.execute(f"PRAGMA synchronous = {SQLITE_SYNCHRONOUS}")
+    conn.execute(f"PRAGMA mmap_size = {int(SQLITE_MMAP_SIZE)}")
+    # Negative cache_size is in KiB rather than pages.
+    conn.execute(f"PRAGMA cache_size = {-abs(int(SQLITE_CACHE_SIZE_KB))}")
+    conn.execute(f"PRAGMA temp_store = {SQLITE_TEMP_STORE}")
+    return conn
+
 def init_db(db_name=DB_NAME):
-    conn = sqlite3.connect(db_name)
+    conn = connect_db(db_name)
     c = conn.cursor()
     c.execute('''
         CREATE TABLE IF NOT EXISTS filings (
@@ -21,12 +57,33 @@ def init_db(db_name=DB_NAME):
             filing_url TEXT,
             filing_date TEXT,
             filing_type TEXT,
-            senator_id INTEGER
+            senator_id INTEGER,
+            filing_date_iso TEXT
         )
     ''')
     conn.commit()
     return conn
 
+def register_iso_date_function(conn):
+    """
+    Makes utilis.to_iso_date available in SQL as iso_date(text), so SQL-side
+    copies and backfills convert dates exactly like the Python insert path.
+    """
+    conn.create_function("iso_date", 1, to_iso_date, deterministic=True)
+
+def with_derived_transaction_columns(transaction):
+    """
+    Appends the columns derived at ingest to a transaction tuple (layout as for insert_transaction):
+    transaction_date_iso, amount_low, amount_high, amount_mid.
+    """
+    return tuple(transaction) + (to_iso_date(transaction[2]),) + parse_amount_range(transaction[9])
+
+def with_filing_date_iso(filing):
+    """
+    Appends filing_date_iso to a filing tuple (layout as for insert_filing).
+    """
+    return tuple(filing) + (to_iso_date(filing[6]),)
+
 def init_senators_tables(conn):
     """
     Create tables:
@@ -70,18 +127,34 @@ def get_senator_id_by_alias(conn, alias_name):
     row = c.fetchone()
     return row[0] if row else None
 
+def get_all_senator_aliases(conn):
+    """
+    Returns every (alias_name, senator_id) pair from senator_aliases.
+    """
+    c = conn.cursor()
+    c.execute("SELECT alias_name, senator_id FROM senator_aliases")
+    return c.fetchall()
+
+# Non-committing write_* helpers run inside a caller-managed transaction
+# (e.g. the DbWriter thread); the insert_*/set_* wrappers commit on their own.
+
+def write_alias_for_senator(conn, senator_id, alias_name):
+    """
+    Non-committing variant of insert_alias_for_senator.
+    """
+    conn.execute('''
+        INSERT OR IGNORE INTO senator_aliases (senator_id, alias_name)
+        VALUES (?, ?)
+    ''', (senator_id, alias_name))
+
 # NEW
 def insert_alias_for_senator(conn, senator_id, alias_name):
     """
     Inserts a new alias into senator_aliases for the given senator_id.
     If alias_name already exists, it will skip due to UNIQUE(alias_name).
     """
-    c = conn.cursor()
     try:
-        c.execute('''
-            INSERT OR IGNORE INTO senator_aliases (senator_id, alias_name)
-            VALUES (?, ?)
-        ''', (senator_id, alias_name))
+        write_alias_for_senator(conn, senator_id, alias_name)
         conn.commit()
         logger.debug(f"Inserted alias '{alias_name}' for senator_id={senator_id}.")
     except Exception as e:
@@ -127,6 +200,10 @@ def init_transactions_table(conn):
                 type TEXT,
                 amount TEXT,
                 comment TEXT,
+                transaction_date_iso TEXT,
+                amount_low INTEGER,
+                amount_high INTEGER,
+                amount_mid INTEGER,
                 PRIMARY KEY (ptr_id, transaction_number)
             )
         ''')
@@ -143,11 +220,12 @@ def insert_transaction(conn, transaction):
             '''
             INSERT OR IGNORE INTO transactions (
                 ptr_id, transaction_number, transaction_date, owner, ticker,
-                asset_name, additional_info, asset_type, type, amount, comment
+                asset_name, additional_info, asset_type, type, amount, comment,
+                transaction_date_iso, amount_low, amount_high, amount_mid
             )
-            VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+            VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
             ''',
-            transaction
+            with_derived_transaction_columns(transaction)
         )
         conn.commit()
         logger.debug(f"insert_transaction succeeded for ptr_id={transaction[0]}")
@@ -155,18 +233,131 @@ def insert_transaction(conn, transaction):
         logger.exception(f"insert_transaction failed: {e}")
         raise
 
+def write_transactions_batch(conn, transactions):
+    """
+    Inserts all transaction tuples of a report with one executemany. Does not commit;
+    the caller (normally DbWriter) owns the transaction, so a report is either fully
+    written or not at all.
+
+    Each tuple has the same layout as for insert_transaction.
+    Returns the number of rows actually inserted (duplicates are ignored).
+    """
+    if not transactions:
+        return 0
+    c = conn.cursor()
+    c.executemany(
+        '''
+        INSERT OR IGNORE INTO transactions (
+            ptr_id, transaction_number, transaction_date, owner, ticker,
+            asset_name, additional_info, asset_type, type, amount, comment,
+            transaction_date_iso, amount_low, amount_high, amount_mid
+        )
+        VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+        ''',
+        [with_derived_transaction_columns(transaction) for transaction in transactions]
+    )
+    logger.debug(f"write_transactions_batch inserted {c.rowcount} of {len(transactions)} rows for ptr_id={transactions[0][0]}")
+    return c.rowcount
+
+def replace_transactions_for_ptr(conn, ptr_id, transactions):
+    """
+    Replaces all stored transactions of one report with the given tuples in a single
+    transaction (used when re-parsing archived pages). Returns the number of rows written.
+    """
+    with conn:
+        c = conn.cursor()
+        c.execute("DELETE FROM transactions WHERE ptr_id = ?", (ptr_id,))
+        c.executemany(
+            '''
+            INSERT OR IGNORE INTO transactions (
+                ptr_id, transaction_number, transaction_date, owner, ticker,
+                asset_name, additional_info, asset_type, type, amount, comment,
+                transaction_date_iso, amount_low, amount_high, amount_mid
+            )
+            VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+            ''',
+            [with_derived_transaction_columns(transaction) for transaction in transactions]
+        )
+        return c.rowcount if transactions else 0
+
 # Scraping Module DB Functions
 
-def get_filing_ptr_ids(conn):
+def init_ptr_scrape_status_table(conn):
+    """
+    Creates ptr_scrape_status, which records the outcome of every PTR download:
+      - last_result: 'ok' (rows stored), 'empty' (parsed to zero rows) or 'error' (download failed)
+      - next_retry_at: when an 'empty'/'error' report may be fetched again (NULL = never)
+    On first creation it is seeded with every report that already has transactions.
+    """
+    c = conn.cursor()
+    c.execute("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'ptr_scrape_status'")
+    exists = c.fetchone() is not None
+    c.execute('''
+        CREATE TABLE IF NOT EXISTS ptr_scrape_status (
+            ptr_id TEXT PRIMARY KEY,
+            attempts INTEGER NOT NULL DEFAULT 0,
+            last_result TEXT,
+            row_count INTEGER,
+            last_attempt_at TEXT,
+            next_retry_at TEXT
+        )
+    ''')
+    if not exists:
+        now = datetime.datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+        c.execute('''
+            INSERT OR IGNORE INTO ptr_scrape_status (ptr_id, attempts, last_result, row_count, last_attempt_at, next_retry_at)
+            SELECT ptr_id, 1, 'ok', COUNT(*), ?, NULL
+            FROM transactions
+            GROUP BY ptr_id
+        ''', (now,))
+        logger.info(f"Seeded ptr_scrape_status with {c.rowcount} already scraped reports.")
+    conn.commit()
+
+def get_filing_ptr_ids(conn, now=None):
     """
-    Retrieve ptr_ids from filings table that have not been processed and are marked as Online.
+    Retrieve ptr_ids of Online filings that still need scraping: never attempted,
+    or last attempt was 'empty'/'error' and its retry time has come.
+    Requires init_ptr_scrape_status_table.
     """
+    now = now or datetime.datetime.now().strftime("%Y-%m-%d %H:%M:%S")
     c = conn.cursor()
-    c.execute("SELECT ptr_id FROM filings WHERE filing_type = 'Online'")
-    all_ptr_ids = {row[0] for row in c.fetchall()}
-    c.execute("SELECT DISTINCT ptr_id FROM transactions")
-    processed_ptr_ids = {row[0] for row in c.fetchall()}
-    return list(all_ptr_ids - processed_ptr_ids)
+    c.execute('''
+        SELECT f.ptr_id
+        FROM filings f
+        LEFT JOIN ptr_scrape_status s ON s.ptr_id = f.ptr_id
+        WHERE f.filing_type = 'Online'
+          AND (s.ptr_id IS NULL OR (s.last_result <> 'ok' AND s.next_retry_at <= ?))
+    ''', (now,))
+    return [row[0] for row in c.fetchall()]
+
+def get_ptr_scrape_attempts(conn, ptr_id):
+    c = conn.cursor()
+    c.execute("SELECT attempts FROM ptr_scrape_status WHERE ptr_id = ?", (ptr_id,))
+    row = c.fetchone()
+    return row[0] if row else 0
+
+def write_ptr_scrape_status(conn, ptr_id, attempts, last_result, row_count, next_retry_at):
+    """
+    Non-committing variant of set_ptr_scrape_status.
+    """
+    last_attempt_at = datetime.datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+    conn.execute('''
+        INSERT INTO ptr_scrape_status (ptr_id, attempts, last_result, row_count, last_attempt_at, next_retry_at)
+        VALUES (?, ?, ?, ?, ?, ?)
+        ON CONFLICT(ptr_id) DO UPDATE SET
+            attempts = excluded.attempts,
+            last_result = excluded.last_result,
+            row_count = excluded.row_count,
+            last_attempt_at = excluded.last_attempt_at,
+            next_retry_at = excluded.next_retry_at
+    ''', (ptr_id, attempts, last_result, row_count, last_attempt_at, next_retry_at))
+
+def set_ptr_scrape_status(conn, ptr_id, attempts, last_result, row_count, next_retry_at):
+    """
+    Inserts or updates the scrape status of one report.
+    """
+    with conn:
+        write_ptr_scrape_status(conn, ptr_id, attempts, last_result, row_count, next_retry_at)
 
 # Create or update the filing scrape log table.
 def init_filing_scrape_log(conn):
@@ -183,9 +374,9 @@ def init_filing_scrape_log(conn):
 def insert_filing(conn, filing):
     c = conn.cursor()
     c.execute('''
-        INSERT OR IGNORE INTO filings (ptr_id, first_name, last_name, full_name, filing_info, filing_url, filing_date, filing_type, senator_id)
-        VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
-    ''', filing)
+        INSERT OR IGNORE INTO filings (ptr_id, first_name, last_name, full_name, filing_info, filing_url, filing_date, filing_type, senator_id, filing_date_iso)
+        VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+    ''', with_filing_date_iso(filing))
     conn.commit()
 
 # Log the scraping event for a given filing (using ptr_id).
@@ -198,6 +389,307 @@ def insert_filing_scrape_log(conn, ptr_id):
     ''', (ptr_id, scraped_at))
     conn.commit()
 
+def write_filings_batch(conn, filings):
+    """
+    Inserts a batch of filing tuples into filings and logs each one in filing_scrape_log
+    with executemany. Does not commit; the caller owns the transaction.
+
+    Each filing tuple has the same layout as for insert_filing:
+        (ptr_id, first_name, last_name, full_name, filing_info, filing_url, filing_date, filing_type, senator_id)
+    Returns (inserted, ignored), where ignored counts filings that already existed.
+    """
+    if not filings:
+        return 0, 0
+    scraped_at = datetime.datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+    c = conn.cursor()
+    c.executemany('''
+        INSERT OR IGNORE INTO filings (ptr_id, first_name, last_name, full_name, filing_info, filing_url, filing_date, filing_type, senator_id, filing_date_iso)
+        VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+    ''', [with_filing_date_iso(filing) for filing in filings])
+    inserted = c.rowcount
+    c.executemany('''
+        INSERT OR IGNORE INTO filing_scrape_log (ptr_id, scraped_at)
+        VALUES (?, ?)
+    ''', [(filing[0], scraped_at) for filing in filings])
+    return inserted, len(filings) - inserted
+
+def get_known_ptr_ids(conn, ptr_ids):
+    """
+    Returns the subset of the given ptr_ids that already exist in the filings table
+    or are parked in pending_filings waiting for their senator to be resolved.
+    """
+    ptr_ids = [ptr_id for ptr_id in ptr_ids if ptr_id]
+    if not ptr_ids:
+        return set()
+    placeholders = ", ".join("?" for _ in ptr_ids)
+    c = conn.cursor()
+    c.execute(f'''
+        SELECT ptr_id FROM filings WHERE ptr_id IN ({placeholders})
+        UNION
+        SELECT ptr_id FROM pending_filings WHERE ptr_id IN ({placeholders})
+    ''', ptr_ids + ptr_ids)
+    return {row[0] for row in c.fetchall()}
+
+def get_newest_filing_date_iso(conn):
+    """
+    Returns the newest stored filing date as YYYY-MM-DD, or None when there are no filings.
+    """
+    c = conn.cursor()
+    c.execute("SELECT MAX(filing_date_iso) FROM filings")
+    return c.fetchone()[0]
+
+# Filing scrape checkpoints
+
+def init_filing_checkpoint_table(conn):
+    """
+    Creates the filing_scrape_checkpoints table. Each row remembers the query
+    parameters of an unfinished run and the offset of the next page to fetch.
+    """
+    c = conn.cursor()
+    c.execute('''
+        CREATE TABLE IF NOT EXISTS filing_scrape_checkpoints (
+            run_key TEXT PRIMARY KEY,
+            query_params TEXT,
+            next_start INTEGER,
+            updated_at TEXT
+        )
+    ''')
+    conn.commit()
+
+def get_filing_checkpoint(conn, run_key):
+    """
+    Returns (query_params, next_start) for an unfinished run, or None.
+    """
+    c = conn.cursor()
+    c.execute("SELECT query_params, next_start FROM filing_scrape_checkpoints WHERE run_key = ?", (run_key,))
+    row = c.fetchone()
+    return (json.loads(row[0]), row[1]) if row else None
+
+def write_filing_checkpoint(conn, run_key, query_params, next_start):
+    """
+    Non-committing variant of save_filing_checkpoint.
+    """
+    updated_at = datetime.datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+    conn.execute('''
+        INSERT INTO filing_scrape_checkpoints (run_key, query_params, next_start, updated_at)
+        VALUES (?, ?, ?, ?)
+        ON CONFLICT(run_key) DO UPDATE SET
+            query_params = excluded.query_params,
+            next_start = excluded.next_start,
+            updated_at = excluded.updated_at
+    ''', (run_key, json.dumps(query_params), next_start, updated_at))
+
+def save_filing_checkpoint(conn, run_key, query_params, next_start):
+    write_filing_checkpoint(conn, run_key, query_params, next_start)
+    conn.commit()
+
+def delete_filing_checkpoint(conn, run_key):
+    c = conn.cursor()
+    c.execute("DELETE FROM filing_scrape_checkpoints WHERE run_key = ?", (run_key,))
+    conn.commit()
+
+# Historical backfill windows
+
+def init_backfill_windows_table(conn):
+    """
+    Creates the filing_backfill_windows table, tracking completion of each
+    submission-date window fetched by the historical backfill.
+    """
+    c = conn.cursor()
+    c.execute('''
+        CREATE TABLE IF NOT EXISTS filing_backfill_windows (
+            window_start TEXT,
+            window_end TEXT,
+            status TEXT,
+            row_count INTEGER,
+            attempts INTEGER DEFAULT 0,
+            last_error TEXT,
+            updated_at TEXT,
+            PRIMARY KEY (window_start, window_end)
+        )
+    ''')
+    conn.commit()
+
+def register_backfill_windows(conn, windows):
+    """
+    Adds (window_start, window_end) pairs as 'pending' unless they are already tracked.
+    """
+    with conn:
+        conn.executemany('''
+            INSERT OR IGNORE INTO filing_backfill_windows (window_start, window_end, status, row_count, attempts)
+            VALUES (?, ?, 'pending', 0, 0)
+        ''', windows)
+
+def get_incomplete_backfill_windows(conn):
+    """
+    Returns (window_start, window_end) for every window that is not complete, oldest first.
+    """
+    c = conn.cursor()
+    c.execute('''
+        SELECT window_start, window_end
+        FROM filing_backfill_windows
+        WHERE status != 'complete'
+        ORDER BY window_start
+    ''')
+    return c.fetchall()
+
+def write_backfill_window(conn, window_start, window_end, status, row_count, last_error=None):
+    """
+    Records the outcome of one backfill window. Does not commit; the caller owns the transaction.
+    """
+    updated_at = datetime.datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+    conn.execute('''
+        UPDATE filing_backfill_windows
+        SET status = ?, row_count = ?, attempts = attempts + 1, last_error = ?, updated_at = ?
+        WHERE window_start = ? AND window_end = ?
+    ''', (status, row_count, last_error, updated_at, window_start, window_end))
+
+# Pending filings (senator name not resolved yet)
+
+def init_pending_filings_table(conn):
+    """
+    Creates the pending_filings table, which holds filings whose senator name
+    could not be resolved. They are promoted into filings once an alias exists.
+    """
+    c = conn.cursor()
+    c.execute('''
+        CREATE TABLE IF NOT EXISTS pending_filings (
+            ptr_id TEXT PRIMARY KEY,
+            first_name TEXT,
+            last_name TEXT,
+            full_name TEXT,
+            filing_info TEXT,
+            filing_url TEXT,
+            filing_date TEXT,
+            filing_type TEXT,
+            alias_name TEXT,
+            first_seen_at TEXT,
+            notified_at TEXT
+        )
+    ''')
+    conn.commit()
+
+def write_pending_filings_batch(conn, pending):
+    """
+    Parks unresolved filings in pending_filings. Does not commit; the caller owns the transaction.
+    Each tuple is (ptr_id, first_name, last_name, full_name, filing_info, filing_url, filing_date, filing_type, alias_name).
+    Returns the number of filings that were not already pending.
+    """
+    if not pending:
+        return 0
+    first_seen_at = datetime.datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+    c = conn.cursor()
+    c.executemany('''
+        INSERT OR IGNORE INTO pending_filings (
+            ptr_id, first_name, last_name, full_name, filing_info, filing_url,
+            filing_date, filing_type, alias_name, first_seen_at
+        )
+        VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+    ''', [row + (first_seen_at,) for row in pending])
+    return c.rowcount
+
+def get_pending_aliases(conn):
+    """
+    Returns (alias_name, filing_count) for every alias with pending filings.
+    """
+    c = conn.cursor()
+    c.execute('''
+        SELECT alias_name, COUNT(*)
+        FROM pending_filings
+        GROUP BY alias_name
+        ORDER BY alias_name
+    ''')
+    return c.fetchall()
+
+def get_unnotified_pending_aliases(conn):
+    """
+    Returns (alias_name, filing_count, sample_ptr_id) for aliases with pending filings
+    that have not been reported in a digest yet.
+    """
+    c = conn.cursor()
+    c.execute('''
+        SELECT alias_name, COUNT(*), MIN(ptr_id)
+        FROM pending_filings
+        WHERE notified_at IS NULL
+        GROUP BY alias_name
+        ORDER BY alias_name
+    ''')
+    return c.fetchall()
+
+def mark_pending_aliases_notified(conn, alias_names):
+    notified_at = datetime.datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+    with conn:
+        conn.executemany(
+            "UPDATE pending_filings SET notified_at = ? WHERE alias_name = ? AND notified_at IS NULL",
+            [(notified_at, alias_name) for alias_name in alias_names]
+        )
+
+def promote_pending_filings(conn, resolved):
+    """
+    Moves pending filings into filings (and filing_scrape_log) in one transaction.
+    resolved is a list of (alias_name, senator_id); every pending filing for those aliases is promoted.
+    Returns the number of filings inserted.
+    """
+    if not resolved:
+        return 0
+    scraped_at = datetime.datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+    register_iso_date_function(conn)
+    with conn:
+        c = conn.cursor()
+        c.executemany('''
+            INSERT OR IGNORE INTO filings (ptr_id, first_name, last_name, full_name, filing_info, filing_url, filing_date, filing_type, senator_id, filing_date_iso)
+            SELECT ptr_id, first_name, last_name, full_name, filing_info, filing_url, filing_date, filing_type, ?, iso_date(filing_date)
+            FROM pending_filings
+            WHERE alias_name = ?
+        ''', [(senator_id, alias_name) for alias_name, senator_id in resolved])
+        inserted = c.rowcount
+        c.executemany('''
+            INSERT OR IGNORE INTO filing_scrape_log (ptr_id, scraped_at)
+            SELECT ptr_id, ? FROM pending_filings WHERE alias_name = ?
+        ''', [(scraped_at, alias_name) for alias_name, _ in resolved])
+        c.executemany(
+            "DELETE FROM pending_filings WHERE alias_name = ?",
+            [(alias_name,) for alias_name, _ in resolved]
+        )
+    return inserted
+
+# Create the scrape state table (simple key/value store for high-water marks).
+def init_scrape_state_table(conn):
+    c = conn.cursor()
+    c.execute('''
+        CREATE TABLE IF NOT EXISTS scrape_state (
+            state_key TEXT PRIMARY KEY,
+            state_value TEXT,
+            updated_at TEXT
+        )
+    ''')
+    conn.commit()
+
+def get_scrape_state(conn, state_key, default=None):
+    """
+    Returns the stored value for state_key, or default if it has never been set.
+    """
+    c = conn.cursor()
+    c.execute("SELECT state_value FROM scrape_state WHERE state_key = ?", (state_key,))
+    row = c.fetchone()
+    return row[0] if row else default
+
+def set_scrape_state(conn, state_key, state_value):
+    """
+    Inserts or updates the stored value for state_key.
+    """
+    c = conn.cursor()
+    updated_at = datetime.datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+    c.execute('''
+        INSERT INTO scrape_state (state_key, state_value, updated_at)
+        VALUES (?, ?, ?)
+        ON CONFLICT(state_key) DO UPDATE SET
+            state_value = excluded.state_value,
+            updated_at = excluded.updated_at
+    ''', (state_key, state_value, updated_at))
+    conn.commit()
+    logger.debug(f"Scrape state '{state_key}' set to '{state_value}'.")
+
 # Notification System DB Functions
 
 def init_notification_log(conn):
@@ -248,7 +740,7 @@ def get_unnotified_transactions(conn):
             SELECT 1 FROM notification_log n
             WHERE n.ptr_id = t.ptr_id AND n.transaction_number = t.transaction_number
         )
-        ORDER BY f.filing_date DESC, t.transaction_date DESC;
+        ORDER BY f.filing_date_iso DESC, t.transaction_date_iso DESC;
     '''
     c.execute(query)
     return c.fetchall()
@@ -341,6 +833,8 @@ def init_transactions_analytics_table(conn):
       - transaction_date, ticker, amount, owner: purchase details.
       - status: 'Closed' if a matching sale is found, 'Open' otherwise.
       - sale_ptr_id, sale_transaction_number, sale_date: details for the matching sale (if available).
+      - purchase_date_iso, sale_date_iso: the same dates as YYYY-MM-DD, used for date arithmetic.
+      - amount_mid: midpoint of the purchase amount range, copied from transactions.
     """
     c = conn.cursor()
     c.execute("""
@@ -351,11 +845,14 @@ def init_transactions_analytics_table(conn):
             purchase_date TEXT,
             ticker TEXT,
             amount TEXT,
+            amount_mid INTEGER,
             owner TEXT,
             status TEXT,
             sale_ptr_id TEXT,
             sale_transaction_number INTEGER,
             sale_date TEXT,
+            purchase_date_iso TEXT,
+            sale_date_iso TEXT,
             price_on_purchase REAL,
             price_7d REAL,
             price_30d REAL,
@@ -0,0 +1,170 @@
+import logging
+from modules.utilis import parse_amount_range
+from modules.db_helper import (
+    init_db,
+    register_iso_date_function,
+    init_senators_tables,
+    init_transactions_table,
+    init_ptr_scrape_status_table,
+    init_analytics_table,
+    init_transactions_analytics_table
+)
+
+# Get the main_logger object
+logger = logging.getLogger("main_logger")
+
+# --- Helpers ---
+
+def table_columns(conn, table):
+    """
+    Returns the column names of table (empty if it does not exist).
+    """
+    return [row[1] for row in conn.execute(f"PRAGMA table_info({table})")]
+
+def add_column_if_missing(conn, table, column, declaration):
+    """
+    ALTER TABLE ... ADD COLUMN, skipped when the column already exists
+    (e.g. created by a newer CREATE TABLE statement).
+    """
+    if column not in table_columns(conn, table):
+        conn.execute(f"ALTER TABLE {table} ADD COLUMN {column} {declaration}")
+
+def ensure_base_tables(conn):
+    """
+    Creates the tables migrations build on, so a fresh database and an
+    existing one go through the same migration steps.
+    """
+    init_senators_tables(conn)
+    init_transactions_table(conn)
+    init_ptr_scrape_status_table(conn)
+    init_analytics_table(conn)
+    init_transactions_analytics_table(conn)
+
+# --- Migrations ---
+# Append only: never edit or reorder a migration that has shipped. Each one runs
+# in its own transaction together with the PRAGMA user_version bump.
+
+def migration_001_hot_path_indexes(conn):
+    # match_transactions looks up sales per ticker, and every analytics query joins filings by senator.
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_transactions_ticker ON transactions (ticker)")
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_filings_senator_id ON filings (senator_id)")
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_transactions_analytics_senator_id ON transactions_analytics (senator_id)")
+
+def migration_002_leaderboard_indexes(conn):
+    # One index per sortable leaderboard column (see bot_utilis.get_leaderboard_column_map).
+    for column in (
+        "total_transaction_value",
+        "total_transaction_count",
+        "average_transaction_amount",
+        "avg_perf_7d",
+        "avg_perf_30d",
+        "avg_perf_current",
+        "accuracy_7d",
+        "accuracy_30d",
+        "accuracy_current",
+        "total_value",
+    ):
+        conn.execute(f"CREATE INDEX IF NOT EXISTS idx_analytics_{column} ON analytics ({column})")
+
+def migration_003_iso_dates(conn):
+    # MM/DD/YYYY text cannot be sorted or range-filtered; keep an ISO copy next to each date.
+    add_column_if_missing(conn, "transactions", "transaction_date_iso", "TEXT")
+    add_column_if_missing(conn, "filings", "filing_date_iso", "TEXT")
+    add_column_if_missing(conn, "transactions_analytics", "purchase_date_iso", "TEXT")
+    add_column_if_missing(conn, "transactions_analytics", "sale_date_iso", "TEXT")
+    register_iso_date_function(conn)
+    conn.execute("UPDATE transactions SET transaction_date_iso = iso_date(transaction_date) WHERE transaction_date_iso IS NULL")
+    conn.execute("UPDATE filings SET filing_date_iso = iso_date(filing_date) WHERE filing_date_iso IS NULL")
+    conn.execute("""
+        UPDATE transactions_analytics
+        SET purchase_date_iso = iso_date(purchase_date),
+            sale_date_iso = iso_date(sale_date)
+        WHERE purchase_date_iso IS NULL
+    """)
+    # Sales are looked up per ticker in date order; purchases are walked in date order.
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_transactions_ticker_date_iso ON transactions (ticker, transaction_date_iso)")
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_transactions_date_iso ON transactions (transaction_date_iso)")
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_filings_filing_date_iso ON filings (filing_date_iso)")
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_transactions_analytics_purchase_date_iso ON transactions_analytics (purchase_date_iso)")
+
+def migration_004_amount_ranges(conn):
+    # Parse the "$15,001-$50,000" display strings once, so analytics can sum in SQL.
+    add_column_if_missing(conn, "transactions", "amount_low", "INTEGER")
+    add_column_if_missing(conn, "transactions", "amount_high", "INTEGER")
+    add_column_if_missing(conn, "transactions", "amount_mid", "INTEGER")
+    add_column_if_missing(conn, "transactions_analytics", "amount_mid", "INTEGER")
+    rows = conn.execute("SELECT ptr_id, transaction_number, amount FROM transactions WHERE amount_mid IS NULL").fetchall()
+    conn.executemany(
+        "UPDATE transactions SET amount_low = ?, amount_high = ?, amount_mid = ? WHERE ptr_id = ? AND transaction_number = ?",
+        [parse_amount_range(amount) + (ptr_id, transaction_number) for ptr_id, transaction_number, amount in rows]
+    )
+    conn.execute("""
+        UPDATE transactions_analytics
+        SET amount_mid = (
+            SELECT t.amount_mid FROM transactions t
+            WHERE t.ptr_id = transactions_analytics.purchase_ptr_id
+              AND t.transaction_number = transactions_analytics.purchase_transaction_number
+        )
+        WHERE amount_mid IS NULL
+    """)
+
+def migration_005_ptr_scrape_status_indexes(conn):
+    # get_filing_ptr_ids filters on filing_type and on each report's retry state.
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_ptr_scrape_status_retry ON ptr_scrape_status (last_result, next_retry_at)")
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_filings_filing_type ON filings (filing_type)")
+
+# (version, description, function); versions are consecutive and start at 1.
+MIGRATIONS = [
+    (1, "hot-path indexes on transactions, filings and transactions_analytics", migration_001_hot_path_indexes),
+    (2, "leaderboard indexes on analytics", migration_002_leaderboard_indexes),
+    (3, "ISO date columns for transactions, filings and transactions_analytics", migration_003_iso_dates),
+    (4, "numeric amount range columns for transactions and transactions_analytics", migration_004_amount_ranges),
+    (5, "retry-state and filing_type indexes for the PTR scrape queue", migration_005_ptr_scrape_status_indexes),
+]
+
+# --- Runner ---
+
+def get_schema_version(conn):
+    return conn.execute("PRAGMA user_version").fetchone()[0]
+
+def run_migrations(conn, migrations=MIGRATIONS):
+    """
+    Applies every migration newer than the database's PRAGMA user_version, in order.
+    Each migration and its version bump commit together, so an interrupted run
+    resumes at the first migration that did not finish.
+    Returns the schema version afterwards.
+    """
+    ensure_base_tables(conn)
+    version = get_schema_version(conn)
+    latest = migrations[-1][0] if migrations else 0
+    if version > latest:
+        logger.warning(f"Database schema version {version} is newer than this code knows ({latest}).")
+        return version
+
+    for target, description, migrate in migrations:
+        if target <= version:
+            continue
+        logger.info(f"Applying schema migration {target}: {description}")
+        try:
+            conn.execute("BEGIN")
+            migrate(conn)
+            conn.execute(f"PRAGMA user_version = {int(target)}")
+            conn.commit()
+        except Exception:
+            conn.rollback()
+            logger.exception(f"Schema migration {target} failed; database left at version {version}.")
+            raise
+        version = target
+    return version
+
+def migrate_database(db_name=None):
+    """
+    Opens the database, brings its schema up to date and closes it again.
+    """
+    conn = init_db(db_name) if db_name else init_db()
+    try:
+        version = run_migrations(conn)
+        logger.debug(f"Database schema is at version {version}.")
+        return version
+    finally:
+        conn.close()
@@ -0,0 +1,206 @@
+import queue
+import threading
+import time
+import logging
+from concurrent.futures import Future
+from modules.config import DB_NAME, DB_WRITER_QUEUE_SIZE, DB_WRITER_BATCH_SIZE, DB_WRITER_FLUSH_SECONDS
+from modules.db_helper import connect_db
+
+# Get the main_logger object
+logger = logging.getLogger("main_logger")
+
+# Queue marker telling the writer thread to commit what it has and stop.
+_STOP = object()
+
+# How long submit() sleeps between attempts while the queue is full.
+_PUT_RETRY_SECONDS = 0.05
+
+
+class DbWriteAborted(RuntimeError):
+    """Set on items that were never run because the writer stopped (ordered failure or thread exit)."""
+
+
+class DbWriter:
+    """
+    Single writer thread owning the scraper's SQLite write connection.
+
+    Any thread may call submit(fn, *args); fn(conn, *args) runs on the writer thread
+    and must use the non-committing write_* helpers from db_helper. Items are grouped
+    into one transaction until `batch_size` items are collected or `flush_interval`
+    seconds have passed since the first one. Each item runs inside its own SAVEPOINT,
+    so a failing item is rolled back alone while the rest of the batch commits.
+
+    With ordered=True the items depend on each other (e.g. pages that each advance a
+    checkpoint): after the first failing item nothing else is written, and every later
+    item fails with DbWriteAborted, so no later item can commit progress past the failure.
+
+    submit() returns a Future that resolves with fn's result only after the batch is
+    committed. The queue holds at most `max_queue` items; submit() blocks when it is
+    full, which slows producers down to the speed of the disk. If the writer thread
+    dies, every pending Future fails and submit() raises instead of blocking.
+    """
+
+    def __init__(self, db_name=DB_NAME, max_queue=DB_WRITER_QUEUE_SIZE,
+                 batch_size=DB_WRITER_BATCH_SIZE, flush_interval=DB_WRITER_FLUSH_SECONDS, ordered=False):
+        self.db_name = db_name
+        self.batch_size = max(1, batch_size)
+        self.flush_interval = flush_interval
+        self.ordered = ordered
+        self.queue = queue.Queue(maxsize=max(1, max_queue))
+        self.closed = False
+        # First failure; in ordered mode it stops all further writes.
+        self.error = None
+        # Set (under lock) once the thread no longer takes items from the queue.
+        self.stopped = False
+        self.lock = threading.Lock()
+        self.thread = threading.Thread(target=self._run, name="db-writer", daemon=True)
+        self.thread.start()
+
+    @property
+    def failed(self):
+        """
+        True once an ordered writer has stopped writing because an item failed.
+        """
+        return self.ordered and self.error is not None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
+    def submit(self, fn, *args):
+        """
+        Queues fn(conn, *args) for the writer thread; blocks while the queue is full.
+        """
+        if self.closed:
+            raise RuntimeError("DbWriter is closed.")
+        future = Future()
+        self._put((fn, args, future))
+        return future
+
+    def _put(self, item):
+        # Checked under the lock the thread takes on exit, so no item can slip in
+        # after the final drain and be left with a Future that never resolves.
+        while True:
+            with self.lock:
+                if self.stopped:
+                    raise RuntimeError("DbWriter thread is not running.")
+                try:
+                    self.queue.put_nowait(item)
+                    return
+                except queue.Full:
+                    pass
+            time.sleep(_PUT_RETRY_SECONDS)
+
+    def flush(self):
+        """
+        Blocks until everything submitted so far is committed.
+        """
+        self.submit(lambda conn: None).result()
+
+    def close(self):
+        """
+        Commits the remaining items and stops the writer thread.
+        """
+        if self.closed:
+            return
+        self.closed = True
+        try:
+            self._put(_STOP)
+        except RuntimeError:
+            pass  # The thread has already exited.
+        self.thread.join()
+
+    def _collect_batch(self):
+        item = self.queue.get()
+        if item is _STOP:
+            return [], True
+        batch = [item]
+        deadline = time.monotonic() + self.flush_interval
+        while len(batch) < self.batch_size:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            try:
+                item = self.queue.get(timeout=remaining)
+            except queue.Empty:
+                break
+            if item is _STOP:
+                return batch, True
+            batch.append(item)
+        return batch, False
+
+    def _run(self):
+        conn = None
+        exit_error = None
+        batch = []
+        try:
+            # isolation_level=None: transactions and savepoints are managed explicitly below.
+            conn = connect_db(self.db_name, isolation_level=None)
+            stop = False
+            while not stop:
+                batch, stop = self._collect_batch()
+                if batch:
+                    self._write_batch(conn, batch)
+        except BaseException as e:
+            exit_error = e
+            logger.exception(f"DB writer thread died: {e}")
+        finally:
+            with self.lock:
+                self.stopped = True
+            self._fail_pending(exit_error, batch)
+            if conn is not None:
+                conn.close()
+
+    def _fail_pending(self, exit_error, batch):
+        # Nothing will take items from the queue any more; fail the interrupted batch
+        # and whatever is still waiting.
+        pending = list(batch)
+        while True:
+            try:
+                item = self.queue.get_nowait()
+            except queue.Empty:
+                break
+            if item is not _STOP:
+                pending.append(item)
+        for _, _, future in pending:
+            if not future.done():
+                future.set_exception(DbWriteAborted(f"DB writer stopped before this item was written: {exit_error}"))
+
+    def _write_batch(self, conn, batch):
+        if self.failed:
+            for _, _, future in batch:
+                future.set_exception(DbWriteAborted(f"Skipped after an earlier write failed: {self.error}"))
+            return
+        results = []
+        try:
+            conn.execute("BEGIN")
+            for fn, args, future in batch:
+                if self.failed:
+                    results.append((future, None, DbWriteAborted(f"Skipped after an earlier write failed: {self.error}")))
+                    continue
+                conn.execute("SAVEPOINT item")
+                try:
+                    results.append((future, fn(conn, *args), None))
+                    conn.execute("RELEASE SAVEPOINT item")
+                except Exception as e:
+                    conn.execute("ROLLBACK TO SAVEPOINT item")
+                    conn.execute("RELEASE SAVEPOINT item")
+                    logger.exception(f"DB write {getattr(fn, '__name__', fn)} failed and was rolled back: {e}")
+                    self.error = self.error or e
+                    results.append((future, None, e))
+            conn.execute("COMMIT")
+        except Exception as e:
+            logger.exception(f"DB writer batch of {len(batch)} items failed: {e}")
+            if conn.in_transaction:
+                conn.execute("ROLLBACK")
+            self.error = self.error or e
+            for _, _, future in batch:
+                future.set_exception(e)
+            return
+        for future, result, error in results:
+            if error is None:
+                future.set_result(result)
+            else:
+                future.set_exception(error)
@@ -0,0 +1,79 @@
+import time
+import logging
+import requests
+from modules.config import CYCLE_BUDGET_SECONDS, HTTP_TIMEOUT_SECONDS
+
+# Get the main_logger object
+logger = logging.getLogger("main_logger")
+
+# Never hand out a socket timeout shorter than this, even right before the deadline.
+MIN_REQUEST_TIMEOUT = 1.0
+
+
+class DeadlineExceeded(requests.Timeout):
+    """
+    Raised instead of starting a network call once the cycle budget is spent.
+    It is a requests.Timeout, so existing transport error handling treats it as
+    a failed request that is retried next cycle.
+    """
+
+
+class CycleDeadline:
+    """
+    Time budget for one main() cycle. Stages ask it how long a request may take
+    (request_timeout) and whether to keep going (expired).
+    """
+
+    def __init__(self, budget_seconds=CYCLE_BUDGET_SECONDS):
+        self.budget_seconds = budget_seconds
+        self.started_at = time.monotonic()
+        self.expires_at = self.started_at + budget_seconds if budget_seconds and budget_seconds > 0 else None
+
+    def remaining(self):
+        """
+        Seconds left in the cycle, or None when the cycle is unbounded.
+        """
+        if self.expires_at is None:
+            return None
+        return max(0.0, self.expires_at - time.monotonic())
+
+    def expired(self):
+        return self.expires_at is not None and time.monotonic() >= self.expires_at
+
+    def request_timeout(self, default=HTTP_TIMEOUT_SECONDS):
+        """
+        Per-request timeout: the default, capped by the remaining budget.
+        Raises DeadlineExceeded when nothing is left.
+        """
+        remaining = self.remaining()
+        if remaining is None:
+            return default
+        if remaining <= 0:
+            raise DeadlineExceeded(f"Cycle budget of {self.budget_seconds}s is spent.")
+        return max(MIN_REQUEST_TIMEOUT, min(default, remaining)) if default else max(MIN_REQUEST_TIMEOUT, remaining)
+
+
+# The deadline of the running cycle; unbounded until main() starts one.
+_current_deadline = CycleDeadline(budget_seconds=None)
+
+def start_cycle(budget_seconds=CYCLE_BUDGET_SECONDS):
+    """
+    Starts a new cycle budget and makes it the one every stage and request sees.
+    """
+    global _current_deadline
+    _current_deadline = CycleDeadline(budget_seconds)
+    logger.debug(f"Cycle started with a budget of {budget_seconds}s.")
+    return _current_deadline
+
+def current_deadline():
+    return _current_deadline
+
+def deadline_expired(stage=None):
+    """
+    True once the cycle budget is spent; logs which stage is stopping early.
+    """
+    if not _current_deadline.expired():
+        return False
+    if stage:
+        logger.warning(f"Cycle deadline reached; stopping {stage}, it resumes next cycle.")
+    return True
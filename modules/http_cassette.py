@@ -0,0 +1,126 @@
+import os
+import io
+import json
+import gzip
+import base64
+import hashlib
+import logging
+from http.client import HTTPMessage
+from urllib.parse import parse_qsl, urlencode
+from urllib3.response import HTTPResponse
+from modules.config import HTTP_CASSETTE_MODE, HTTP_CASSETTE_DIR
+from modules.http_client import ResilientAdapter
+
+# Get the main_logger object
+logger = logging.getLogger("main_logger")
+
+# Form fields that change on every run (pinned snapshot time, CSRF tokens) and must
+# not be part of the cassette key, or replays would never match.
+CASSETTE_IGNORED_FIELDS = {"submitted_end_date", "csrfmiddlewaretoken"}
+
+# Response headers describing the wire encoding; the stored body is already decoded.
+CASSETTE_DROPPED_HEADERS = {"content-encoding", "content-length", "transfer-encoding"}
+
+
+class CassetteMissError(Exception):
+    """Raised in replay mode when no recorded response matches a request."""
+
+
+def cassette_replaying():
+    """
+    True when requests are served from disk; callers use it to skip politeness delays.
+    """
+    return HTTP_CASSETTE_MODE == "replay"
+
+def cassette_key(request):
+    """
+    Returns a stable hash for a prepared request: method, URL and the form body
+    with volatile fields removed and the remaining fields sorted.
+    """
+    body = request.body or b""
+    if isinstance(body, str):
+        body = body.encode("utf-8")
+    fields = [(k, v) for k, v in parse_qsl(body.decode("utf-8", "replace"), keep_blank_values=True)
+              if k not in CASSETTE_IGNORED_FIELDS]
+    normalized = f"{request.method} {request.url}\n{urlencode(sorted(fields))}"
+    return hashlib.sha256(normalized.encode("utf-8")).hexdigest()
+
+
+class RecordedOriginalResponse:
+    """
+    Stand-in for the http.client response urllib3 normally wraps. requests reads
+    Set-Cookie headers from it to fill the session cookie jar.
+    """
+
+    def __init__(self, method, cookies):
+        self._method = method
+        self.msg = HTTPMessage()
+        for name, value in cookies.items():
+            self.msg["Set-Cookie"] = f"{name}={value}; Path=/"
+
+    def isclosed(self):
+        return True
+
+    def close(self):
+        pass
+
+
+class CassetteAdapter(ResilientAdapter):
+    """
+    Transport adapter that records request/response pairs to disk ("record") or
+    serves them back without touching the network ("replay"). Accepts the same
+    pooling/retry arguments as ResilientAdapter, which handles live traffic.
+
+    Each exchange is stored as a gzipped JSON file named after cassette_key(request).
+    """
+
+    def __init__(self, cassette_dir=HTTP_CASSETTE_DIR, mode=HTTP_CASSETTE_MODE, **kwargs):
+        super().__init__(**kwargs)
+        self.cassette_dir = cassette_dir
+        self.mode = mode
+
+    def cassette_path(self, key):
+        return os.path.join(self.cassette_dir, key[:2], f"{key}.json.gz")
+
+    def send(self, request, stream=False, timeout=None, verify=True, cert=None, proxies=None):
+        path = self.cassette_path(cassette_key(request))
+        if self.mode == "replay":
+            if not os.path.exists(path):
+                raise CassetteMissError(f"No recorded response for {request.method} {request.url}")
+            return self.load(request, path)
+
+        response = super().send(request, stream=stream, timeout=timeout, verify=verify, cert=cert, proxies=proxies)
+        if self.mode == "record":
+            self.save(request, response, path)
+        return response
+
+    def save(self, request, response, path):
+        record = {
+            "method": request.method,
+            "url": request.url,
+            "status": response.status_code,
+            "reason": response.reason,
+            "headers": {k: v for k, v in response.headers.items() if k.lower() not in CASSETTE_DROPPED_HEADERS},
+            "cookies": response.cookies.get_dict(),
+            "body": base64.b64encode(response.content).decode("ascii"),
+        }
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        tmp_path = f"{path}.{os.getpid()}.tmp"
+        with gzip.open(tmp_path, "wt", encoding="utf-8") as f:
+            json.dump(record, f)
+        os.replace(tmp_path, path)
+        logger.debug(f"Recorded {request.method} {request.url} -> {path}")
+
+    def load(self, request, path):
+        with gzip.open(path, "rt", encoding="utf-8") as f:
+            record = json.load(f)
+        raw = HTTPResponse(
+            body=io.BytesIO(base64.b64decode(record["body"])),
+            headers=record["headers"],
+            status=record["status"],
+            reason=record["reason"],
+            preload_content=False,
+            decode_content=False,
+            original_response=RecordedOriginalResponse(request.method, record["cookies"]),
+        )
+        return self.build_response(request, raw)
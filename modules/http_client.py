@@ -0,0 +1,197 @@
+import random
+import threading
+import time
+import logging
+import requests
+from urllib.parse import urlparse
+from requests.adapters import HTTPAdapter
+from requests.utils import select_proxy
+from urllib3.util.retry import Retry
+from modules.config import (
+    HTTP_POOL_SIZE,
+    HTTP_TIMEOUT_SECONDS,
+    HTTP_MAX_RETRIES,
+    HTTP_BACKOFF_FACTOR,
+    HTTP_BACKOFF_JITTER,
+    HTTP_BACKOFF_MAX,
+    CIRCUIT_FAILURE_THRESHOLD,
+    CIRCUIT_RESET_SECONDS
+)
+from modules.deadline import current_deadline
+
+# Get the main_logger object
+logger = logging.getLogger("main_logger")
+
+# Responses that mean "try again later" rather than "your request is wrong".
+RETRY_STATUS_CODES = (429, 500, 502, 503, 504)
+
+
+class CircuitOpenError(requests.ConnectionError):
+    """Raised without touching the network while a host's circuit breaker is open."""
+
+
+class CircuitBreaker:
+    """
+    Consecutive-failure circuit breaker for one host.
+
+    After `threshold` failed requests in a row the circuit opens and requests fail
+    immediately for `reset_seconds`. Then a single trial request is let through
+    (half-open): success closes the circuit, failure opens it again.
+    """
+
+    def __init__(self, host, threshold=CIRCUIT_FAILURE_THRESHOLD, reset_seconds=CIRCUIT_RESET_SECONDS):
+        self.host = host
+        self.threshold = max(1, threshold)
+        self.reset_seconds = reset_seconds
+        self.failures = 0
+        self.opened_at = None
+        self.trial_in_flight = False
+        self.lock = threading.Lock()
+
+    def before_request(self):
+        with self.lock:
+            if self.opened_at is None:
+                return
+            remaining = self.opened_at + self.reset_seconds - time.monotonic()
+            if remaining > 0 or self.trial_in_flight:
+                raise CircuitOpenError(f"Circuit open for {self.host}; retry in {max(0, int(remaining))}s.")
+            self.trial_in_flight = True
+
+    def record_success(self):
+        with self.lock:
+            if self.opened_at is not None:
+                logger.info(f"Circuit for {self.host} closed again.")
+            self.failures = 0
+            self.opened_at = None
+            self.trial_in_flight = False
+
+    def record_failure(self):
+        with self.lock:
+            self.failures += 1
+            self.trial_in_flight = False
+            if self.opened_at is not None or self.failures >= self.threshold:
+                self.opened_at = time.monotonic()
+                logger.warning(
+                    f"Circuit for {self.host} opened after {self.failures} consecutive failures; "
+                    f"pausing requests for {self.reset_seconds}s."
+                )
+
+
+_breakers = {}
+_breakers_lock = threading.Lock()
+
+def circuit_breaker_for(host):
+    """
+    Returns the process-wide breaker for host, so every session shares its state.
+    """
+    with _breakers_lock:
+        if host not in _breakers:
+            _breakers[host] = CircuitBreaker(host)
+        return _breakers[host]
+
+# Methods that may be re-sent after a read error or 5xx without side effects.
+IDEMPOTENT_METHODS = frozenset({"GET", "HEAD"})
+
+
+class IdempotentRetry(Retry):
+    """
+    Retry that only re-sends non-idempotent requests (POST) when the server cannot
+    have acted on them: connect errors (urllib3 retries those for every method) and
+    a 429 with Retry-After. A webhook POST that timed out on read or got a 5xx may
+    already have been delivered, so it is not sent again.
+    """
+
+    def is_retry(self, method, status_code, has_retry_after=False):
+        if method and method.upper() not in IDEMPOTENT_METHODS:
+            return bool(self.total and self.respect_retry_after_header and has_retry_after and status_code == 429)
+        return super().is_retry(method, status_code, has_retry_after)
+
+
+def build_retry(max_retries=HTTP_MAX_RETRIES):
+    """
+    urllib3 retry policy: exponential backoff with jitter, honouring Retry-After.
+    Read errors and 5xx are retried for GET/HEAD only; POST is retried on connect
+    errors and on 429 with Retry-After (see IdempotentRetry).
+    The last response is returned rather than raised so callers keep their status checks.
+    """
+    return IdempotentRetry(
+        total=max_retries,
+        connect=max_retries,
+        read=max_retries,
+        status=max_retries,
+        backoff_factor=HTTP_BACKOFF_FACTOR,
+        backoff_jitter=HTTP_BACKOFF_JITTER,
+        backoff_max=HTTP_BACKOFF_MAX,
+        status_forcelist=RETRY_STATUS_CODES,
+        allowed_methods=IDEMPOTENT_METHODS,
+        respect_retry_after_header=True,
+        raise_on_status=False
+    )
+
+def backoff_delay(attempt, factor=HTTP_BACKOFF_FACTOR, jitter=HTTP_BACKOFF_JITTER, maximum=HTTP_BACKOFF_MAX):
+    """
+    Same schedule as build_retry(), for application-level retries (e.g. undecodable
+    responses) that urllib3 cannot see: factor * 2**attempt plus random jitter.
+    """
+    return min(maximum, factor * (2 ** attempt)) + random.uniform(0, jitter)
+
+
+class ResilientAdapter(HTTPAdapter):
+    """
+    HTTPAdapter with a connection pool sized for our worker threads, the shared
+    retry policy, the per-host circuit breaker and a timeout on every request,
+    capped by what is left of the cycle deadline.
+    """
+
+    def __init__(self, pool_size=HTTP_POOL_SIZE, max_retries=None, timeout=HTTP_TIMEOUT_SECONDS, **kwargs):
+        kwargs.setdefault("pool_connections", pool_size)
+        kwargs.setdefault("pool_maxsize", pool_size)
+        super().__init__(max_retries=max_retries if max_retries is not None else build_retry(), **kwargs)
+        self.timeout = timeout
+
+    def send(self, request, stream=False, timeout=None, verify=True, cert=None, proxies=None):
+        timeout = timeout if timeout is not None else self.timeout
+        if not isinstance(timeout, tuple):
+            # Raises DeadlineExceeded once the cycle budget is spent; not a host failure.
+            timeout = current_deadline().request_timeout(timeout)
+        # Keyed per route, so one bad proxy cannot open the circuit for the host on every proxy.
+        proxy = select_proxy(request.url, proxies or {})
+        host = urlparse(request.url).netloc
+        breaker = circuit_breaker_for(f"{host} via {proxy}" if proxy else host)
+        breaker.before_request()
+        try:
+            response = super().send(
+                request, stream=stream, timeout=timeout, verify=verify, cert=cert, proxies=proxies
+            )
+        except requests.RequestException:
+            breaker.record_failure()
+            raise
+        if response.status_code in RETRY_STATUS_CODES:
+            breaker.record_failure()
+        else:
+            breaker.record_success()
+        return response
+
+
+def create_http_session(pool_size=HTTP_POOL_SIZE):
+    """
+    Creates a requests session with ResilientAdapter mounted for http and https.
+    """
+    session = requests.Session()
+    adapter = ResilientAdapter(pool_size=pool_size)
+    session.mount("https://", adapter)
+    session.mount("http://", adapter)
+    return session
+
+_http_session = None
+_http_session_lock = threading.Lock()
+
+def get_http_session():
+    """
+    Returns the process-wide session used for webhooks and other non-efdsearch calls.
+    """
+    global _http_session
+    with _http_session_lock:
+        if _http_session is None:
+            _http_session = create_http_session()
+        return _http_session
@@ -1,5 +1,4 @@
 import requests
-import sqlite3
 import datetime
 import time
 import logging
@@ -11,7 +10,10 @@ from modules.config import (
     DISCORD_WEBHOOK_NOTIFICATION_OTHER,
     DISCORD_WEBHOOK_DEBUG
 )
+from modules.http_client import get_http_session
+from modules.deadline import deadline_expired
 from modules.db_helper import (
+    connect_db,
     init_notification_log,
     get_unnotified_transactions,
     log_notification
@@ -111,7 +113,7 @@ def send_transaction_discord_notification(transaction, webhook_url, embeds=None)
         "attachments": [],
         "allowed_mentions": {"roles": []}
     }
-    response = requests.post(webhook_url, json=payload)
+    response = get_http_session().post(webhook_url, json=payload)
     return response
 
 def send_debug_notification_unknown_senator(ptr_id, alias_name):
@@ -136,26 +138,73 @@ def send_debug_notification_unknown_senator(ptr_id, alias_name):
         "allowed_mentions": { "parse": [] }  # don't ping anyone
     }
 
-    response = requests.post(DISCORD_WEBHOOK_DEBUG, json=payload)
+    response = get_http_session().post(DISCORD_WEBHOOK_DEBUG, json=payload)
     logger.info(
         f"Debug notification sent for unknown senator alias '{alias_name}' (ptr_id={ptr_id}). "
         f"Status: {response.status_code}"
     )
     return response
 
+def send_debug_digest_unknown_senators(entries):
+    """
+    Sends a single digest to the Discord 'debug' channel listing every unrecognized
+    senator name found this cycle. Each entry is (alias_name, filing_count, sample_ptr_id, suggestion),
+    where suggestion is a short text (or "") describing the most likely known senator.
+    """
+    lines = []
+    for alias_name, filing_count, sample_ptr_id, suggestion in entries:
+        line = f"**{alias_name}** - {filing_count} filing(s), e.g. {sample_ptr_id}"
+        if suggestion:
+            line += f"\n  likely: {suggestion}"
+        lines.append(line)
+
+    # Discord caps embed descriptions at 4096 characters.
+    description = ""
+    for index, line in enumerate(lines):
+        if len(description) + len(line) + 100 > 4096:
+            description += f"...and {len(lines) - index} more."
+            break
+        description += line + "\n"
+
+    embed = {
+        "title": f"Unknown Senator Names Detected ({len(entries)})",
+        "description": description + "\nAdd an alias to senator_aliases; pending filings are promoted next cycle.",
+        "color": 15158332,
+        "timestamp": datetime.datetime.utcnow().isoformat()
+    }
+
+    payload = {
+        "embeds": [embed],
+        "allowed_mentions": { "parse": [] }  # don't ping anyone
+    }
+
+    response = get_http_session().post(DISCORD_WEBHOOK_DEBUG, json=payload)
+    logger.info(f"Debug digest sent for {len(entries)} unknown senator aliases. Status: {response.status_code}")
+    return response
+
 # --- Main Process ---
 
 def send_unnotified_discord_notifications():
     # Open the database connection
-    conn = sqlite3.connect(DB_NAME)
+    conn = connect_db(DB_NAME)
     init_notification_log(conn)
     
     unnotified_transactions = get_unnotified_transactions(conn)
     logger.info(f"Found {len(unnotified_transactions)} unnotified transactions.")
     
     total_new_notifications = 0
+    stopped_early = False
     for transaction in unnotified_transactions:
-        responses = send_transaction_notifications(transaction)
+        if deadline_expired("send_unnotified_discord_notifications"):
+            stopped_early = True
+            break
+        try:
+            responses = send_transaction_notifications(transaction)
+        except requests.RequestException as e:
+            # Discord is unreachable (retries exhausted or circuit open); the rest go out next cycle.
+            logger.warning(f"Stopping notifications for this cycle: {e}")
+            stopped_early = True
+            break
         notified_at = datetime.datetime.now().strftime("%Y-%m-%d %H:%M:%S")
         
         # Check if all responses are successful
@@ -173,3 +222,4 @@ def send_unnotified_discord_notifications():
     
     logger.info(f"Total new notifications sent: {total_new_notifications}")
     conn.close()
+    return not stopped_early
@@ -0,0 +1,162 @@
+import threading
+import time
+import logging
+import requests
+from modules.config import (
+    PROXY_REQUESTS_PER_SECOND,
+    PROXY_EJECT_AFTER_FAILURES,
+    PROXY_MIN_HEALTH,
+    PROXY_EJECT_SECONDS
+)
+from modules.rate_limiter import TokenBucket
+from modules.deadline import DeadlineExceeded
+
+# Get the main_logger object
+logger = logging.getLogger("main_logger")
+
+# Responses that mean the egress IP is being refused or throttled rather than the request being wrong.
+PROXY_FAILURE_STATUS_CODES = {403, 407, 429, 502, 503, 504}
+
+# Weight of the latest outcome in the health score (exponential moving average).
+HEALTH_SMOOTHING = 0.2
+
+# Longest an ejected proxy stays out of rotation, however often it has failed.
+MAX_EJECT_SECONDS = 3600
+
+
+class NoHealthyProxyError(requests.ConnectionError):
+    """Raised when every proxy in the pool is currently ejected."""
+
+
+class ProxyEntry:
+    """
+    One egress proxy: its own client (session and cookies), rate limit and health.
+    """
+
+    def __init__(self, proxy, client, rate):
+        self.proxy = proxy
+        self.client = client
+        self.bucket = TokenBucket(rate)
+        self.health = 1.0
+        self.consecutive_failures = 0
+        self.in_flight = 0
+        self.ejections = 0
+        self.ejected_until = None
+        self.last_used = 0
+
+
+class ProxyPool:
+    """
+    Spreads requests over several proxies. Exposes get()/post()/request() like the
+    client it wraps, so scrapers use it exactly like a single session.
+
+    - Affinity: each proxy has its own client, created by client_factory(proxy), so
+      cookies and login state always travel through the same egress IP.
+    - Health: every response updates an exponential moving average per proxy
+      (connection errors and block/throttle statuses count as failures).
+    - Ejection: after PROXY_EJECT_AFTER_FAILURES consecutive failures, or when health
+      drops below PROXY_MIN_HEALTH, a proxy is benched for PROXY_EJECT_SECONDS
+      (doubling on repeat ejections) and then re-admitted on probation.
+    - Rate limits: each proxy has its own TokenBucket of PROXY_REQUESTS_PER_SECOND.
+    Requests go to the healthiest available proxy with the fewest requests in flight,
+    rotating between equally good ones.
+    """
+
+    def __init__(self, proxies, client_factory, rate=PROXY_REQUESTS_PER_SECOND):
+        self.entries = [ProxyEntry(proxy, client_factory(proxy), rate) for proxy in proxies]
+        self.lock = threading.Lock()
+        self.sequence = 0
+
+    def __len__(self):
+        return len(self.entries)
+
+    def _available(self, entry, now):
+        if entry.ejected_until is None:
+            return True
+        if now < entry.ejected_until:
+            return False
+        # Probation: back in rotation, but one more failure ejects it again.
+        entry.ejected_until = None
+        entry.health = PROXY_MIN_HEALTH + HEALTH_SMOOTHING
+        entry.consecutive_failures = max(0, PROXY_EJECT_AFTER_FAILURES - 1)
+        logger.info(f"Proxy {entry.proxy} re-admitted on probation.")
+        return True
+
+    def acquire(self):
+        """
+        Picks a proxy for one request and marks it in flight.
+        """
+        with self.lock:
+            now = time.monotonic()
+            candidates = [entry for entry in self.entries if self._available(entry, now)]
+            if not candidates:
+                raise NoHealthyProxyError("All proxies are ejected; retry later.")
+            # Best health per in-flight request (coarsened so near-equal proxies tie), then least recently used.
+            entry = max(candidates, key=lambda e: (round(e.health / (1 + e.in_flight), 1), -e.last_used))
+            self.sequence += 1
+            entry.last_used = self.sequence
+            entry.in_flight += 1
+        entry.bucket.acquire()
+        return entry
+
+    def release(self, entry, ok):
+        """
+        Records the outcome of a request made through entry and updates its health.
+        ok=None only frees the slot (the request never got an answer either way).
+        """
+        with self.lock:
+            entry.in_flight -= 1
+            if ok is None:
+                return
+            entry.health = (1 - HEALTH_SMOOTHING) * entry.health + HEALTH_SMOOTHING * (1.0 if ok else 0.0)
+            if ok:
+                entry.consecutive_failures = 0
+                if entry.health >= 0.9:
+                    entry.ejections = 0
+                return
+            entry.consecutive_failures += 1
+            if entry.ejected_until is None and (
+                entry.consecutive_failures >= PROXY_EJECT_AFTER_FAILURES or entry.health < PROXY_MIN_HEALTH
+            ):
+                seconds = min(MAX_EJECT_SECONDS, PROXY_EJECT_SECONDS * (2 ** entry.ejections))
+                entry.ejections += 1
+                entry.ejected_until = time.monotonic() + seconds
+                logger.warning(
+                    f"Ejecting proxy {entry.proxy} for {seconds:.0f}s "
+                    f"(health {entry.health:.2f}, {entry.consecutive_failures} consecutive failures)."
+                )
+
+    def request(self, method, url, **kwargs):
+        entry = self.acquire()
+        try:
+            response = entry.client.request(method, url, **kwargs)
+        except DeadlineExceeded:
+            # Our own budget ran out; says nothing about the proxy.
+            self.release(entry, ok=None)
+            raise
+        except requests.RequestException:
+            self.release(entry, ok=False)
+            raise
+        except BaseException:
+            self.release(entry, ok=None)
+            raise
+        self.release(entry, ok=response.status_code not in PROXY_FAILURE_STATUS_CODES)
+        return response
+
+    def get(self, url, **kwargs):
+        return self.request("GET", url, **kwargs)
+
+    def post(self, url, **kwargs):
+        return self.request("POST", url, **kwargs)
+
+    def health_report(self):
+        """
+        Returns [(proxy, health, in_flight, ejected)] for logging.
+        """
+        with self.lock:
+            now = time.monotonic()
+            return [
+                (entry.proxy, round(entry.health, 2), entry.in_flight,
+                 entry.ejected_until is not None and now < entry.ejected_until)
+                for entry in self.entries
+            ]
@@ -0,0 +1,77 @@
+import os
+import gzip
+import hashlib
+import logging
+from modules.config import PTR_ARCHIVE_DIR
+
+# Get the main_logger object
+logger = logging.getLogger("main_logger")
+
+ARCHIVE_SUFFIX = ".html.gz"
+
+
+def ptr_archive_dir(ptr_id, archive_dir=PTR_ARCHIVE_DIR):
+    """
+    Directory holding every archived version of one report:
+    <archive_dir>/<first two chars of ptr_id>/<ptr_id>/
+    """
+    return os.path.join(archive_dir, ptr_id[:2], ptr_id)
+
+def archive_ptr_page(ptr_id, html, archive_dir=PTR_ARCHIVE_DIR):
+    """
+    Stores a downloaded PTR page as <sha256 of the HTML>.html.gz under the report's
+    directory and returns the hash. Identical content is only written once.
+    Safe to call from several threads.
+    """
+    data = html.encode("utf-8")
+    content_hash = hashlib.sha256(data).hexdigest()
+    directory = ptr_archive_dir(ptr_id, archive_dir)
+    path = os.path.join(directory, content_hash + ARCHIVE_SUFFIX)
+    if os.path.exists(path):
+        # Refresh the mtime so this stays the newest version of the report.
+        os.utime(path)
+        return content_hash
+    os.makedirs(directory, exist_ok=True)
+    tmp_path = f"{path}.{os.getpid()}.{id(data)}.tmp"
+    with gzip.open(tmp_path, "wb") as f:
+        f.write(data)
+    os.replace(tmp_path, path)
+    logger.debug(f"Archived ptr_id {ptr_id} as {content_hash}.")
+    return content_hash
+
+def latest_archived_page(ptr_id, archive_dir=PTR_ARCHIVE_DIR):
+    """
+    Returns the most recently archived HTML for ptr_id, or None.
+    """
+    directory = ptr_archive_dir(ptr_id, archive_dir)
+    if not os.path.isdir(directory):
+        return None
+    versions = [os.path.join(directory, name) for name in os.listdir(directory) if name.endswith(ARCHIVE_SUFFIX)]
+    if not versions:
+        return None
+    with gzip.open(max(versions, key=os.path.getmtime), "rb") as f:
+        return f.read().decode("utf-8")
+
+def archived_ptr_ids(archive_dir=PTR_ARCHIVE_DIR):
+    """
+    Yields the ptr_id of every report in the archive.
+    """
+    if not os.path.isdir(archive_dir):
+        return
+    for shard in sorted(os.listdir(archive_dir)):
+        shard_dir = os.path.join(archive_dir, shard)
+        if not os.path.isdir(shard_dir):
+            continue
+        for ptr_id in sorted(os.listdir(shard_dir)):
+            if os.path.isdir(os.path.join(shard_dir, ptr_id)):
+                yield ptr_id
+
+def iter_archived_pages(archive_dir=PTR_ARCHIVE_DIR, ptr_ids=None):
+    """
+    Yields (ptr_id, html) for the latest archived version of each report
+    (all archived reports, or only the given ptr_ids).
+    """
+    for ptr_id in (ptr_ids if ptr_ids is not None else archived_ptr_ids(archive_dir)):
+        html = latest_archived_page(ptr_id, archive_dir)
+        if html is not None:
+            yield ptr_id, html
@@ -0,0 +1,72 @@
+import threading
+import time
+from contextlib import contextmanager
+
+
+class TokenBucket:
+    """
+    Thread-safe token bucket limiting how many requests may start per second.
+
+    rate is the number of tokens added per second and capacity the maximum burst.
+    A rate of None (or <= 0) disables limiting entirely.
+    """
+
+    def __init__(self, rate, capacity=None):
+        self.rate = rate if rate and rate > 0 else None
+        self.capacity = capacity if capacity else max(1.0, self.rate or 1.0)
+        self.tokens = self.capacity
+        self.updated_at = time.monotonic()
+        self.lock = threading.Lock()
+
+    def _refill(self):
+        now = time.monotonic()
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated_at) * self.rate)
+        self.updated_at = now
+
+    def acquire(self, tokens=1):
+        """
+        Blocks until the requested number of tokens is available, then consumes them.
+        """
+        if self.rate is None:
+            return
+        while True:
+            with self.lock:
+                self._refill()
+                if self.tokens >= tokens:
+                    self.tokens -= tokens
+                    return
+                wait = (tokens - self.tokens) / self.rate
+            time.sleep(wait)
+
+
+class HostThrottle:
+    """
+    Per-host politeness limits shared by a pool of worker threads: at most
+    max_concurrent requests in flight to one host, started no faster than
+    rate requests per second (a TokenBucket per host).
+    """
+
+    def __init__(self, max_concurrent, rate=None):
+        self.max_concurrent = max(1, max_concurrent)
+        self.rate = rate
+        self.semaphores = {}
+        self.buckets = {}
+        self.lock = threading.Lock()
+
+    def _limits_for(self, host):
+        with self.lock:
+            if host not in self.semaphores:
+                self.semaphores[host] = threading.BoundedSemaphore(self.max_concurrent)
+                self.buckets[host] = TokenBucket(self.rate)
+            return self.semaphores[host], self.buckets[host]
+
+    @contextmanager
+    def slot(self, host):
+        """
+        Context manager holding one concurrency slot for host; waits for the
+        rate limit before entering.
+        """
+        semaphore, bucket = self._limits_for(host)
+        with semaphore:
+            bucket.acquire()
+            yield
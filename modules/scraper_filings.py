@@ -1,28 +1,68 @@
 import requests
 import sqlite3
 import re
-from requests.adapters import HTTPAdapter
-from urllib3.util.retry import Retry
 import time
 import datetime
 import logging
-from modules.config import USE_DATE_FILTER, DATE_FILTER_DAYS, DB_NAME
-from modules.session_utilis import get_csrf_token
-from modules.notify_system import send_debug_notification_unknown_senator
+from collections import deque
+from zoneinfo import ZoneInfo
+from concurrent.futures import Future, ThreadPoolExecutor, as_completed
+from modules.config import (
+    USE_DATE_FILTER,
+    DATE_FILTER_DAYS,
+    DB_NAME,
+    USE_INCREMENTAL_SCRAPE,
+    INCREMENTAL_LOOKBACK_DAYS,
+    FILINGS_FETCH_WORKERS,
+    FILINGS_REQUESTS_PER_SECOND,
+    BACKFILL_WINDOW_MONTHS,
+    BACKFILL_WINDOW_WORKERS
+)
+from modules.session_utilis import get_efd_session, cassette_replaying, egress_count
+from modules.http_client import backoff_delay
+from modules.deadline import deadline_expired, DeadlineExceeded
+from modules.rate_limiter import TokenBucket
+from modules.senator_resolver import SenatorAliasResolver
+from modules.notify_system import send_debug_digest_unknown_senators
 from modules.db_helper import (
     init_db,
     init_filing_scrape_log,
-    insert_filing,
-    insert_filing_scrape_log,
+    write_filings_batch,
     init_senators_tables,
-    get_senator_id_by_alias,
     insert_new_senator,
-    insert_alias_for_senator
+    insert_alias_for_senator,
+    init_scrape_state_table,
+    get_scrape_state,
+    set_scrape_state,
+    get_known_ptr_ids,
+    get_newest_filing_date_iso,
+    init_pending_filings_table,
+    write_pending_filings_batch,
+    get_pending_aliases,
+    get_unnotified_pending_aliases,
+    mark_pending_aliases_notified,
+    promote_pending_filings,
+    init_backfill_windows_table,
+    register_backfill_windows,
+    get_incomplete_backfill_windows,
+    write_backfill_window,
+    init_filing_checkpoint_table,
+    get_filing_checkpoint,
+    save_filing_checkpoint,
+    write_filing_checkpoint,
+    delete_filing_checkpoint
 )
+from modules.db_writer import DbWriter
 
 # Get the main_logger object
 logger = logging.getLogger("main_logger")
 
+# scrape_state key holding the newest filing date (MM/DD/YYYY) already stored.
+FILINGS_WATERMARK_KEY = "filings_high_water_mark"
+
+# filing_scrape_checkpoints key for the regular scrape_filings run.
+FILINGS_CHECKPOINT_KEY = "scrape_filings"
+
 # Extract the PTR (or paper) id using a regex pattern for a GUID.
 def extract_ptr_id(link_html):
     match = re.search(r'([0-9a-fA-F]{8}-[0-9a-fA-F]{4}-[0-9a-fA-F]{4}-[0-9a-fA-F]{4}-[0-9a-fA-F]{12})', link_html)
@@ -35,70 +75,303 @@ def clean_name_part(raw_name):
     cleaned = cleaned.rstrip(",.")
     return cleaned
 
-def fetch_page(session, headers, payload, start, expected_length, url):
+class FilingsFetchError(Exception):
+    """Raised when a page of search results could not be retrieved."""
+
+class SnapshotDriftError(FilingsFetchError):
+    """Raised when the result set changed while it was being paged through."""
+
+def filings_rate_limiter():
+    """
+    Token bucket for the search endpoint, scaled by the number of egress proxies
+    (each proxy also enforces its own rate); unlimited when replaying a cassette.
+    """
+    return TokenBucket(None if cassette_replaying() else FILINGS_REQUESTS_PER_SECOND * egress_count())
+
+# efdsearch filters submission dates in US Eastern time, whatever the host's clock says.
+EFD_TIMEZONE = ZoneInfo("America/New_York")
+
+def efd_now():
+    """
+    Current US Eastern wall-clock time as a naive datetime, comparable with efdsearch dates.
+    """
+    return datetime.datetime.now(EFD_TIMEZONE).replace(tzinfo=None, microsecond=0)
+
+def snapshot_end_date(now=None):
+    """
+    Returns the current time formatted for submitted_end_date. Pinning the end of the
+    search range at scrape start keeps the descending result set stable while paging,
+    since filings submitted mid-run fall outside the range.
+    now defaults to efd_now(), so the bound is on efdsearch's (Eastern) calendar.
+    """
+    return (now or efd_now()).strftime("%m/%d/%Y %H:%M:%S")
+
+def fetch_page(session, headers, payload, start, expected_length, url, rate_limiter=None):
+    """
+    Fetches one page of search results and returns (page_data, records_total).
+    Connection errors, 429s and 5xx responses are already retried with backoff by the
+    shared HTTP client; this loop only retries other non-200 answers and undecodable JSON.
+    With a pinned submitted_end_date a short page is a real anomaly, not a race.
+    """
+    # Work on a copy so concurrent workers never share the 'start' value.
+    payload = payload.copy()
     payload['start'] = str(start)
     retries = 0
     while retries < 3:
-        response = session.post(url, data=payload, headers=headers)
-        if response.status_code == 200:
-            response_json = response.json()
-            page_data = response_json.get('data', [])
-            total_records = int(response_json.get('recordsTotal', 0))
-            logger.debug(f"[DEBUG] Page start: {start}, Expected rows: {expected_length}, Received rows: {len(page_data)}")
-            if page_data:
-                logger.debug(f"[DEBUG] First row: {page_data[0]}")
-                logger.debug(f"[DEBUG] Last row: {page_data[-1]}")
-                pass
-            # If not the last page and we received fewer rows than expected, retry.
-            if len(page_data) < expected_length and (start + expected_length) < total_records:
-                logger.debug(f"[DEBUG] Incomplete data at start {start}. Retrying (attempt {retries + 1})...")
-                retries += 1
-                time.sleep(2)
-            else:
-                return page_data
-        else:
+        if rate_limiter:
+            rate_limiter.acquire()
+        try:
+            response = session.post(url, data=payload, headers=headers)
+            if response.status_code == 200:
+                response_json = response.json()
+                page_data = response_json.get('data', [])
+                total_records = int(response_json.get('recordsTotal', 0))
+                logger.debug(f"[DEBUG] Page start: {start}, Expected rows: {expected_length}, Received rows: {len(page_data)}")
+                if page_data:
+                    logger.debug(f"[DEBUG] First row: {page_data[0]}")
+                    logger.debug(f"[DEBUG] Last row: {page_data[-1]}")
+                return page_data, total_records
             logger.debug(f"[DEBUG] HTTP error {response.status_code} at start {start}; retrying (attempt {retries + 1})...")
-            retries += 1
-            time.sleep(2)
-    logger.debug(f"[DEBUG] Failed to fetch complete data for page starting at {start} after 3 attempts.")
-    return []
+        except requests.RequestException as e:
+            # Already retried by the HTTP client (or the host's circuit is open); give up on this page.
+            raise FilingsFetchError(f"Failed to fetch page starting at {start}: {e}") from e
+        except ValueError as e:
+            logger.debug(f"[DEBUG] Undecodable response at start {start}: {e}; retrying (attempt {retries + 1})...")
+        time.sleep(backoff_delay(retries))
+        retries += 1
+    logger.debug(f"[DEBUG] Failed to fetch data for page starting at {start} after 3 attempts.")
+    raise FilingsFetchError(f"Failed to fetch page starting at {start} after 3 attempts.")
+
+def fetch_filings(session, headers, payload_base, expected_length=100,
+                  workers=FILINGS_FETCH_WORKERS, rate_limiter=None, start_offset=0):
+    """
+    Generator that pages through the report search results and yields (start, rows)
+    for each page as soon as it is available, in offset order. Paging begins at
+    start_offset, which lets an interrupted run resume from its checkpoint.
+
+    Once the first response gives recordsTotal, the remaining page offsets are fetched
+    by a bounded pool of workers under a shared token bucket (FILINGS_REQUESTS_PER_SECOND).
+    Prefetching only starts after the consumer has taken the first page, so a caller
+    that stops there (incremental scrape, nothing new) costs a single request.
+    At most `workers` pages are held in memory at once. Closing the generator early
+    (e.g. the consumer breaks out of its loop) cancels any pages not yet started.
 
-def fetch_filings(session, headers, payload_base, expected_length=100):
+    payload_base should carry a fixed submitted_end_date (see snapshot_end_date). Every
+    page's recordsTotal is checked against the first response, and the number of rows
+    received against recordsTotal; any difference raises SnapshotDriftError.
+    """
     url = "https://efdsearch.senate.gov/search/report/data/"
-    # Get initial data to determine the total record count.
-    payload = payload_base.copy()
-    payload['start'] = '0'
-    response = session.post(url, data=payload, headers=headers)
-    if response.status_code != 200:
-        logger.debug(f"[DEBUG] Failed to retrieve initial data, status: {response.status_code}")
-        return []
-    data = response.json()
-    print(data)
-    total_records = int(data.get('recordsTotal', 0))
+    if rate_limiter is None:
+        rate_limiter = filings_rate_limiter()
+    if not payload_base.get('submitted_end_date'):
+        logger.warning("fetch_filings called without a pinned submitted_end_date; pages may shift mid-run.")
+
+    # Get initial data to determine the total record count; it doubles as the first page.
+    first_page, total_records = fetch_page(session, headers, payload_base, start_offset, expected_length, url, rate_limiter)
     logger.debug(f"[DEBUG] Total records according to first response: {total_records}")
-    filings = []
 
-    # Loop through pages based on the captured total record count.
-    for start in range(0, total_records, expected_length):
-        logger.debug(f"[DEBUG] Fetching records starting at {start}...")
-        page_data = fetch_page(session, headers, payload, start, expected_length, url)
-        filings.extend(page_data)
-        logger.debug(f"[DEBUG] Total filings collected so far: {len(filings)}")
-        time.sleep(2)  # delay to avoid rate limits
+    offsets = iter(range(start_offset, total_records, expected_length))
+    pending = deque()
+    executor = ThreadPoolExecutor(max_workers=max(1, workers))
 
-    return filings
+    def submit_next():
+        start = next(offsets, None)
+        if start is None:
+            return False
+        if start == start_offset:
+            future = Future()
+            future.set_result((first_page, total_records))
+        else:
+            future = executor.submit(fetch_page, session, headers, payload_base, start, expected_length, url, rate_limiter)
+        pending.append((start, future))
+        return True
 
-def scrape_filings():
-    # Set submitted_start_date depending on filter settings
-    if USE_DATE_FILTER:
-        print(USE_DATE_FILTER)
-        submitted_start_date = (datetime.datetime.now() - datetime.timedelta(days=DATE_FILTER_DAYS)).strftime("%m/%d/%Y") + " 00:00:00"
-    else:
-        # When not filtering, you could use an earlier date or an empty string.
-        submitted_start_date = '01/01/2012 00:00:00'
+    rows_seen = 0
+    try:
+        # Only the first page to begin with: an incremental run usually stops right after
+        # it (already known), and must not have paid for prefetched pages.
+        submit_next()
+        while pending:
+            start, future = pending.popleft()
+            page_data, page_total = future.result()
+            if page_total != total_records:
+                raise SnapshotDriftError(
+                    f"recordsTotal changed from {total_records} to {page_total} at start {start}."
+                )
+            expected_rows = min(expected_length, total_records - start)
+            if len(page_data) != expected_rows:
+                raise SnapshotDriftError(
+                    f"Page at start {start} returned {len(page_data)} rows, expected {expected_rows}."
+                )
+            rows_seen += len(page_data)
+            logger.debug(f"[DEBUG] Page start {start} done with {len(page_data)} rows.")
+            yield start, page_data
+            # The consumer wants more: keep at most `workers` pages in flight, handed out strictly in order.
+            while len(pending) < max(1, workers) and submit_next():
+                pass
+        logger.debug(f"[DEBUG] Snapshot verified: {rows_seen} rows from start {start_offset} of {total_records} received.")
+    finally:
+        executor.shutdown(wait=True, cancel_futures=True)
+
+def parse_filing_date(filing_date):
+    """
+    Parses a MM/DD/YYYY filing date into a datetime, or returns None if it is malformed.
+    """
+    try:
+        return datetime.datetime.strptime(filing_date.strip(), "%m/%d/%Y")
+    except (AttributeError, ValueError):
+        return None
+
+def page_is_known(conn, page_data):
+    """
+    Returns True if every filing on the page already exists in the filings table.
+    Since results are sorted by filing date descending, everything past such a page is known too.
+    """
+    ptr_ids = [extract_ptr_id(item[3]) for item in page_data]
+    if not ptr_ids or None in ptr_ids:
+        return False
+    return len(get_known_ptr_ids(conn, ptr_ids)) == len(set(ptr_ids))
+
+def update_filings_watermark(conn):
+    """
+    Sets the persisted high-water mark to the newest filing date actually stored.
+    Read from the filings table rather than from the pages of this run, which after
+    resuming from a checkpoint only cover the tail of the result set.
+    """
+    newest_iso = get_newest_filing_date_iso(conn)
+    if newest_iso is None:
+        return
+    newest = datetime.datetime.strptime(newest_iso, "%Y-%m-%d").strftime("%m/%d/%Y")
+    if get_scrape_state(conn, FILINGS_WATERMARK_KEY) != newest:
+        set_scrape_state(conn, FILINGS_WATERMARK_KEY, newest)
+        logger.info(f"Filings high-water mark set to {newest}.")
+
+def write_filings_page(conn, page_data, resolver, learned=None):
+    """
+    Resolves one page of filing rows and writes them without committing;
+    runs on the DbWriter thread, which commits it with the rest of its batch.
+    Aliases auto-matched along the way are collected in `learned` (see resolve_or_learn).
+    Returns the number of filings that were actually new.
+    """
+    filing_tuples = []
+    pending_tuples = []
+    for item in page_data:
+        # Each item is expected to be in the form:
+        # [first_name, last_name, filing_info, link_html, filing_date]
+        first_name = clean_name_part(item[0])
+        last_name  = clean_name_part(item[1])
+        filing_info = item[2]
+        link_html = item[3]
+        filing_date = item[4]
+        
+        ptr_id = extract_ptr_id(link_html)
+        
+        # Also extract the URL from the HTML
+        link_match = re.search(r'href="([^"]+)"', link_html)
+        filing_url = link_match.group(1) if link_match else ""
+        
+        # Determine filing type based on the URL.
+        # If the URL contains "ptr", it's an online filing; if it contains "paper", it's a paper filing.
+        if "ptr" in filing_url.lower():
+            filing_type = "Online"
+        elif "paper" in filing_url.lower():
+            filing_type = "Paper"
+        else:
+            filing_type = "Unknown"
+
+        full_name = f"{first_name} {last_name}"
+        alias_name = full_name
+
+        senator_id = resolver.resolve_or_learn(conn, alias_name, learned)
+        if senator_id is None:
+            # Auto-create a brand new senator row using the full_name as a placeholder
+            # Uncomment this part of code, if you want to fill up a fresh database and do manual review
+            # senator_id = insert_new_senator(conn, canonical_full_name=alias_name)
+            # insert_alias_for_senator(conn, senator_id, alias_name)
+            # logger.info(f"Auto-created new senator with ID={senator_id} for alias='{alias_name}'")
+            
+            # We haven't recognized this name yet. Park the filing until an alias is added;
+            # it is reported in the end-of-run digest and promoted locally once resolved.
+            logger.info(f"Unknown senator name: {alias_name} for ptr_id={ptr_id}. Manual review needed.")
+            pending_tuples.append((ptr_id, first_name, last_name, full_name, filing_info, filing_url, filing_date, filing_type, alias_name))
+            continue # Skip insertion for this filing until it's resolved
+        else:
+            logger.debug(f"Resolved alias '{alias_name}' to senator_id {senator_id}")
+        
+        filing_tuple = (ptr_id, first_name, last_name, full_name, filing_info, filing_url, filing_date, filing_type, senator_id)
+        filing_tuples.append(filing_tuple)
+
+    # Insert the filings and log the scrape events for the whole page at once.
+    inserted, ignored = write_filings_batch(conn, filing_tuples)
+    new_pending = write_pending_filings_batch(conn, pending_tuples)
+    logger.debug(f"Page written: {inserted} new filings, {ignored} already known, {new_pending} newly pending.")
+    return inserted
+
+def promote_resolved_pending_filings(conn, resolver):
+    """
+    Promotes pending filings whose alias can now be resolved (added manually or
+    matched by the resolver) into filings, without re-scraping them.
+    """
+    resolved = []
+    learned = {}
+    for alias_name, filing_count in get_pending_aliases(conn):
+        senator_id = resolver.resolve_or_learn(conn, alias_name, learned)
+        if senator_id is not None:
+            resolved.append((alias_name, senator_id))
+    if resolved:
+        promoted = promote_pending_filings(conn, resolved)
+        logger.info(f"Promoted {promoted} pending filings for {len(resolved)} newly resolved aliases.")
+    # Commit aliases learned by the resolver along the way, then make them resolvable.
+    conn.commit()
+    resolver.add_learned(learned)
+
+def store_filings_page(conn, page_data, resolver, payload_base, next_start, learned):
+    """
+    DbWriter item: one page of filings plus the checkpoint pointing past it,
+    so the checkpoint never runs ahead of the rows that are actually stored.
+    """
+    inserted = write_filings_page(conn, page_data, resolver, learned)
+    write_filing_checkpoint(conn, FILINGS_CHECKPOINT_KEY, payload_base, next_start)
+    return inserted
 
-    # Set up the session and headers
-    session = requests.Session()
+def store_backfill_window(conn, window_start, window_end, rows, resolver, learned):
+    """
+    DbWriter item: a fetched backfill window's filings plus its completion mark.
+    """
+    inserted = write_filings_page(conn, rows, resolver, learned)
+    write_backfill_window(conn, window_start, window_end, "complete", len(rows))
+    return inserted
+
+def send_unknown_senator_digest(conn, resolver):
+    """
+    Reports every not-yet-reported unknown alias in one debug message, with the
+    resolver's best guess, and marks them as notified on success.
+    """
+    unnotified = get_unnotified_pending_aliases(conn)
+    if not unnotified:
+        return
+    entries = []
+    for alias_name, filing_count, sample_ptr_id in unnotified:
+        suggestions = resolver.suggest(alias_name, limit=1)
+        suggestion = ""
+        if suggestions:
+            senator_id, confidence, matched_alias = suggestions[0]
+            suggestion = f"{matched_alias} (senator_id={senator_id}, confidence {confidence})"
+        entries.append((alias_name, filing_count, sample_ptr_id, suggestion))
+    try:
+        response = send_debug_digest_unknown_senators(entries)
+    except requests.RequestException as e:
+        logger.warning(f"Could not send the unknown senator digest ({e}); will retry next cycle.")
+        return
+    if response.status_code in (200, 204):
+        mark_pending_aliases_notified(conn, [entry[0] for entry in entries])
+
+def create_filings_session():
+    """
+    Returns (session, headers): the shared efdsearch session manager (which supplies
+    cookies and the CSRF header) and the search request headers.
+    """
+    session = get_efd_session()
     headers = {
         'Accept': 'application/json, text/javascript, */*; q=0.01',
         'Accept-Encoding': 'gzip, deflate, br, zstd',
@@ -116,15 +389,18 @@ def scrape_filings():
         'Sec-Fetch-Mode': 'cors',
         'Sec-Fetch-Site': 'same-origin',
         'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/125.0.0.0 Safari/537.36',
-        'X-Csrftoken': '3tHsilnrXTwoGWAgauMFS34eKfCqJzq6jHihXeXaLBDywoXG0xo82qjMnyKPqmce',
         'X-Requested-With': 'XMLHttpRequest'
     }
-    headers = get_csrf_token(session, headers)
-    
+    return session, headers
+
+def build_filings_payload(submitted_start_date, submitted_end_date=''):
+    """
+    Returns the report search payload for the given submission date range.
+    """
     # Define the base payload (do not change the key authentication/payload parts)
     # IMPORTANT: The 'order[0][column]' is set to '4' to force sorting by filing date.
     # This value must remain '4' in future revisions to maintain a consistent sort order and successful scraping.
-    payload_base = {
+    return {
         'draw': '1',
         'columns[0][data]': '0',
         'columns[0][name]': '',
@@ -165,7 +441,7 @@ def scrape_filings():
         'report_types': '[11]',
         'filer_types': '[]',
         'submitted_start_date': submitted_start_date, # Scraper will only look at filings from seven days ago
-        'submitted_end_date': '',
+        'submitted_end_date': submitted_end_date,
         'candidate_state': '',
         'senator_state': '',
         'office_id': '',
@@ -173,66 +449,252 @@ def scrape_filings():
         'last_name': ''
     }
 
+def scrape_filings():
+    # Initialize database, filings table, and the filing scrape log table.
+    conn = init_db()
+    init_filing_scrape_log(conn)
+    init_senators_tables(conn)
+    init_scrape_state_table(conn)
+    init_pending_filings_table(conn)
+    init_filing_checkpoint_table(conn)
+
+    # Load all known aliases once; lookups during the run are in-memory.
+    resolver = SenatorAliasResolver.from_db(conn)
+    promote_resolved_pending_filings(conn, resolver)
+
+    session, headers = create_filings_session()
+
+    # Resume an interrupted run from its last committed page, with the same query parameters.
+    checkpoint = get_filing_checkpoint(conn, FILINGS_CHECKPOINT_KEY)
+    if checkpoint:
+        payload_base, start_offset = checkpoint
+        logger.info(f"Resuming filings scrape from checkpoint at start {start_offset}.")
+    else:
+        watermark = parse_filing_date(get_scrape_state(conn, FILINGS_WATERMARK_KEY, ""))
+
+        # Set submitted_start_date depending on filter settings
+        if USE_DATE_FILTER:
+            print(USE_DATE_FILTER)
+            submitted_start_date = (datetime.datetime.now() - datetime.timedelta(days=DATE_FILTER_DAYS)).strftime("%m/%d/%Y") + " 00:00:00"
+        elif USE_INCREMENTAL_SCRAPE and watermark:
+            # Only look back a safety margin before the newest filing we already have.
+            submitted_start_date = (watermark - datetime.timedelta(days=INCREMENTAL_LOOKBACK_DAYS)).strftime("%m/%d/%Y") + " 00:00:00"
+            logger.info(f"Incremental scrape from high-water mark {watermark.strftime('%m/%d/%Y')} (start date {submitted_start_date}).")
+        else:
+            # When not filtering, you could use an earlier date or an empty string.
+            submitted_start_date = '01/01/2012 00:00:00'
+
+        # Pin the end of the range so filings arriving mid-run cannot shift the pages.
+        payload_base = build_filings_payload(submitted_start_date, snapshot_end_date())
+        start_offset = 0
+        save_filing_checkpoint(conn, FILINGS_CHECKPOINT_KEY, payload_base, start_offset)
+
     print(payload_base)
     
     logger.info("Starting data fetch...")
-    filings_data = fetch_filings(session, headers, payload_base)
-    logger.info(f"Fetched a total of {len(filings_data)} filings.")
+    total_fetched = 0
+    total_inserted = 0
+    pages = fetch_filings(session, headers, payload_base, start_offset=start_offset)
+    # Pages are handed to the writer thread, so parsing the next page overlaps with the commit.
+    # Ordered: each page advances the checkpoint, so nothing may be written after a failed page.
+    writer = DbWriter(ordered=True)
+    page_writes = []
+    completed = False
+    out_of_time = False
+    snapshot_drifted = False
+    try:
+        for start, page_data in pages:
+            if writer.failed:
+                logger.error("Stopping pagination: writing an earlier page failed.")
+                break
+            if deadline_expired("scrape_filings"):
+                # The checkpoint points at the next uncommitted page.
+                out_of_time = True
+                break
+            total_fetched += len(page_data)
+            if USE_INCREMENTAL_SCRAPE and page_is_known(conn, page_data):
+                logger.info("Stopping pagination: page contains only known filings.")
+                break
+            learned = {}
+            page_write = writer.submit(store_filings_page, page_data, resolver, payload_base, start + len(page_data), learned)
+            # Aliases the page auto-matched become resolvable only once the page has committed.
+            resolver.add_after_commit(page_write, learned)
+            page_writes.append(page_write)
+        completed = not out_of_time
+    except SnapshotDriftError as e:
+        # The pinned result set itself changed; resuming it would drift again, so start fresh next cycle.
+        # The checkpoint is dropped only after the writer closes: pages still queued would write it back.
+        logger.error(f"Filings fetch aborted: {e}")
+        snapshot_drifted = True
+    except FilingsFetchError as e:
+        # Pages already committed are kept and the checkpoint lets the next cycle resume.
+        logger.error(f"Filings fetch aborted: {e}")
+    finally:
+        pages.close()
+        writer.close()
+    for page_write in page_writes:
+        try:
+            total_inserted += page_write.result()
+        except Exception as e:
+            # The ordered writer wrote nothing after the first failed page, so the
+            # checkpoint stays before it and the next cycle fetches it again.
+            logger.error(f"Writing a filings page failed: {e}")
+            completed = False
+    logger.info(f"Fetched a total of {total_fetched} filings, inserted {total_inserted}.")
+
+    if completed:
+        delete_filing_checkpoint(conn, FILINGS_CHECKPOINT_KEY)
+        update_filings_watermark(conn)
+    elif snapshot_drifted:
+        delete_filing_checkpoint(conn, FILINGS_CHECKPOINT_KEY)
+    send_unknown_senator_digest(conn, resolver)
+    conn.close()
+    logger.info("Data insertion complete.")
+
+# --- Historical Backfill ---
+
+def date_windows(start_date, end_date, months=BACKFILL_WINDOW_MONTHS):
+    """
+    Splits [start_date, end_date] into consecutive windows of `months` calendar months.
+    Returns a list of (window_start, window_end) dates. The last window always runs to
+    the end of its block, even past end_date, so the open window keeps the same key in
+    filing_backfill_windows from run to run (fetch_filings_window caps it at the snapshot).
+    """
+    windows = []
+    window_start = datetime.date(start_date.year, start_date.month, 1)
+    end_date = end_date.date() if isinstance(end_date, datetime.datetime) else end_date
+    while window_start <= end_date:
+        month_index = window_start.month - 1 + months
+        next_start = datetime.date(window_start.year + month_index // 12, month_index % 12 + 1, 1)
+        window_end = next_start - datetime.timedelta(days=1)
+        windows.append((window_start, window_end))
+        window_start = next_start
+    return windows
+
+def fetch_filings_window(session, headers, window_start, window_end, rate_limiter, snapshot_at):
+    """
+    Fetches every filing submitted within one date window and returns the rows.
+    Pages within a window are fetched sequentially; windows run in parallel.
+    The window end is capped at snapshot_at so the window currently being filed into stays stable.
+    """
+    if deadline_expired():
+        # Marked failed by the caller and fetched again next cycle.
+        raise DeadlineExceeded("Cycle deadline reached before this window started.")
+    window_end = min(window_end.replace(hour=23, minute=59, second=59), snapshot_at)
+    payload = build_filings_payload(
+        window_start.strftime("%m/%d/%Y") + " 00:00:00",
+        snapshot_end_date(window_end)
+    )
+    rows = []
+    for _, page_data in fetch_filings(session, headers, payload, workers=1, rate_limiter=rate_limiter):
+        rows.extend(page_data)
+    return rows
+
+def needs_filings_backfill():
+    """
+    Returns True for a fresh database (no filings and no high-water mark) or
+    when a previous backfill left windows that are not complete yet.
+    """
+    conn = init_db()
+    init_scrape_state_table(conn)
+    init_backfill_windows_table(conn)
+    c = conn.cursor()
+    c.execute("SELECT 1 FROM filings LIMIT 1")
+    has_filings = c.fetchone() is not None
+    has_watermark = get_scrape_state(conn, FILINGS_WATERMARK_KEY) is not None
+    has_incomplete_windows = bool(get_incomplete_backfill_windows(conn))
+    conn.close()
+    return (not has_filings and not has_watermark) or has_incomplete_windows
+
+def report_backfill_window_writes(window_writes, wait=False):
+    """
+    Logs the outcome of every finished backfill window write (or of all of them when
+    wait is True). window_writes holds (window_start, window_end, row_count, future).
+    Returns (writes still pending, number of failed writes).
+    """
+    pending = []
+    failed = 0
+    for window_start, window_end, row_count, window_write in window_writes:
+        if not wait and not window_write.done():
+            pending.append((window_start, window_end, row_count, window_write))
+            continue
+        try:
+            inserted = window_write.result()
+        except Exception as e:
+            # Left incomplete in filing_backfill_windows, so the next backfill run retries it.
+            failed += 1
+            logger.error(f"Writing backfill window {window_start}..{window_end} failed: {e}")
+            continue
+        logger.info(f"Backfill window {window_start}..{window_end}: {row_count} filings, {inserted} new.")
+    return pending, failed
+
+def backfill_filings(start_date=datetime.date(2012, 1, 1), end_date=None, workers=BACKFILL_WINDOW_WORKERS):
+    """
+    Historical backfill: splits the date range into windows (BACKFILL_WINDOW_MONTHS long),
+    fetches them concurrently under one shared rate limit and records each window's
+    completion in filing_backfill_windows. Windows already complete are skipped, so a
+    failed window is simply re-run by calling this again.
+    """
+    end_date = end_date or datetime.date.today()
 
-    # Initialize database, filings table, and the filing scrape log table.
     conn = init_db()
     init_filing_scrape_log(conn)
     init_senators_tables(conn)
-    
-    # Insert filings and log the scrape event.
-    for item in filings_data:
-        # Each item is expected to be in the form:
-        # [first_name, last_name, filing_info, link_html, filing_date]
-        first_name = clean_name_part(item[0])
-        last_name  = clean_name_part(item[1])
-        filing_info = item[2]
-        link_html = item[3]
-        filing_date = item[4]
-        
-        ptr_id = extract_ptr_id(link_html)
-        
-        # Also extract the URL from the HTML
-        link_match = re.search(r'href="([^"]+)"', link_html)
-        filing_url = link_match.group(1) if link_match else ""
-        
-        # Determine filing type based on the URL.
-        # If the URL contains "ptr", it's an online filing; if it contains "paper", it's a paper filing.
-        if "ptr" in filing_url.lower():
-            filing_type = "Online"
-        elif "paper" in filing_url.lower():
-            filing_type = "Paper"
-        else:
-            filing_type = "Unknown"
+    init_scrape_state_table(conn)
+    init_pending_filings_table(conn)
+    init_backfill_windows_table(conn)
 
-        full_name = f"{first_name} {last_name}"
-        alias_name = full_name
+    resolver = SenatorAliasResolver.from_db(conn)
+    promote_resolved_pending_filings(conn, resolver)
 
-        senator_id = get_senator_id_by_alias(conn, alias_name)
-        if senator_id is None:
-            # Auto-create a brand new senator row using the full_name as a placeholder
-            # Uncomment this part of code, if you want to fill up a fresh database and do manual review
-            # senator_id = insert_new_senator(conn, canonical_full_name=alias_name)
-            # insert_alias_for_senator(conn, senator_id, alias_name)
-            # logger.info(f"Auto-created new senator with ID={senator_id} for alias='{alias_name}'")
-            
-            # We haven't recognized this name yet. We'll log and continue.
-            logger.info(f"Unknown senator name: {alias_name} for ptr_id={ptr_id}. Manual review needed.")
-            send_debug_notification_unknown_senator(ptr_id, alias_name)
-            continue # Skip insertion for this filing until it's resolved
-        else:
-            logger.debug(f"Resolved alias '{alias_name}' to senator_id {senator_id}")
-        
-        filing_tuple = (ptr_id, first_name, last_name, full_name, filing_info, filing_url, filing_date, filing_type, senator_id)
-        insert_filing(conn, filing_tuple)
-        # Log the scraping event for this filing.
-        insert_filing_scrape_log(conn, ptr_id)
-        
-        logger.debug(f"Inserted filing {ptr_id} for {first_name} {last_name} with type {filing_type} and logged scrape time.")
-    
+    register_backfill_windows(conn, [
+        (window_start.strftime("%Y-%m-%d"), window_end.strftime("%Y-%m-%d"))
+        for window_start, window_end in date_windows(start_date, end_date)
+    ])
+    windows = get_incomplete_backfill_windows(conn)
+    logger.info(f"Backfill: {len(windows)} windows to fetch between {start_date} and {end_date}.")
+
+    session, headers = create_filings_session()
+    rate_limiter = filings_rate_limiter()
+    snapshot_at = efd_now()
+    failed = 0
+    # (window_start, window_end, row_count, future). Rows are not kept here: once a
+    # window is committed nothing references them any more.
+    window_writes = []
+
+    with ThreadPoolExecutor(max_workers=max(1, workers)) as executor, DbWriter() as writer:
+        futures = {
+            executor.submit(
+                fetch_filings_window, session, headers,
+                datetime.datetime.strptime(window_start, "%Y-%m-%d"),
+                datetime.datetime.strptime(window_end, "%Y-%m-%d"),
+                rate_limiter, snapshot_at
+            ): (window_start, window_end)
+            for window_start, window_end in windows
+        }
+        # Windows are handed to the single writer thread as they finish.
+        for future in as_completed(futures):
+            # Popped so the finished fetch future does not pin its rows until the end.
+            window_start, window_end = futures.pop(future)
+            try:
+                rows = future.result()
+            except Exception as e:
+                failed += 1
+                logger.error(f"Backfill window {window_start}..{window_end} failed: {e}")
+                writer.submit(write_backfill_window, window_start, window_end, "failed", 0, str(e))
+                continue
+            learned = {}
+            window_write = writer.submit(store_backfill_window, window_start, window_end, rows, resolver, learned)
+            resolver.add_after_commit(window_write, learned)
+            window_writes.append((window_start, window_end, len(rows), window_write))
+            del rows
+            window_writes, write_failures = report_backfill_window_writes(window_writes)
+            failed += write_failures
+
+    _, write_failures = report_backfill_window_writes(window_writes, wait=True)
+    failed += write_failures
+
+    update_filings_watermark(conn)
+    send_unknown_senator_digest(conn, resolver)
     conn.close()
-    logger.info("Data insertion complete.")
\ No newline at end of file
+    logger.info(f"Backfill finished: {len(windows) - failed} windows complete, {failed} failed.")
@@ -1,30 +1,93 @@
 import requests
 import sqlite3
 import re
-import time
+import os
+import gzip
+import json
+import base64
 import logging
+import datetime
+import multiprocessing
+from itertools import islice
+from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor, wait, FIRST_COMPLETED
+from urllib.parse import urlparse
 from bs4 import BeautifulSoup
-from modules.config import PROXY
-from modules.db_helper import init_db, init_transactions_table, get_filing_ptr_ids, insert_transaction
-from modules.session_utilis import get_csrf_token, accept_disclaimer
+from modules.config import (
+    PTR_PARSER,
+    HTTP_CASSETTE_DIR,
+    PTR_FETCH_WORKERS,
+    PTR_MAX_PER_HOST,
+    PTR_REQUESTS_PER_SECOND,
+    PTR_PARSE_WORKERS,
+    PTR_ARCHIVE_ENABLED,
+    PTR_ARCHIVE_DIR,
+    PTR_RETRY_BASE_HOURS,
+    PTR_RETRY_MAX_HOURS,
+    PTR_MAX_ATTEMPTS
+)
+from modules.db_helper import (
+    init_db,
+    init_transactions_table,
+    init_ptr_scrape_status_table,
+    get_filing_ptr_ids,
+    get_ptr_scrape_attempts,
+    set_ptr_scrape_status,
+    write_ptr_scrape_status,
+    write_transactions_batch,
+    replace_transactions_for_ptr
+)
+from modules.db_writer import DbWriter
+from modules.session_utilis import get_efd_session, cassette_replaying, egress_count
+from modules.rate_limiter import HostThrottle
+from modules.deadline import deadline_expired, DeadlineExceeded
+from modules.http_client import CircuitOpenError
+from modules.proxy_pool import NoHealthyProxyError
+from modules.ptr_archive import archive_ptr_page, iter_archived_pages
 from modules.utilis import normalize_amount_field_format
 
+# lxml is optional; without it the BeautifulSoup parser is used.
+try:
+    from lxml import html as lxml_html
+except ImportError:
+    lxml_html = None
+
 
 # Get the main_logger object
 logger = logging.getLogger("main_logger")
 
-# --- Scraping Function ---
+# --- Parsing Functions ---
 
-def scrape_transactions_for_ptr(session, headers, ptr_id):
-    url = f"https://efdsearch.senate.gov/search/view/ptr/{ptr_id}/"
-    logger.debug(f"Scraping transactions from: {url}")
-    
-    response = session.get(url, headers=headers)
-    if response.status_code != 200:
-        logger.error(f"Failed to retrieve {url}, status code {response.status_code}")
-        return []
-    
-    soup = BeautifulSoup(response.text, "html.parser")
+def build_transaction_tuple(ptr_id, transaction_number, transaction_date, owner, ticker,
+                            asset_name, additional_info, asset_type, txn_type, raw_amount, comment):
+    """
+    Builds the 11-field transaction tuple stored in the transactions table.
+    Shared by both parser engines so their output is identical.
+    """
+    try:
+        txn_num_int = int(transaction_number)
+    except ValueError:
+        txn_num_int = None
+
+    return (
+        ptr_id,
+        txn_num_int,
+        transaction_date,
+        owner,
+        ticker,
+        asset_name,
+        additional_info,
+        asset_type,
+        txn_type,
+        normalize_amount_field_format(raw_amount),
+        comment
+    )
+
+def parse_ptr_transactions_bs4(html, ptr_id):
+    """
+    Reference parser: BeautifulSoup with html.parser. Slower, but kept as the fallback
+    and as the baseline for check_ptr_parser_parity.
+    """
+    soup = BeautifulSoup(html, "html.parser")
     transactions = []
     
     table_div = soup.find("div", class_="table-responsive")
@@ -48,10 +111,6 @@ def scrape_transactions_for_ptr(session, headers, ptr_id):
         if len(cols) < 9:
             continue  # Skip rows that don't have enough columns.
         
-        transaction_number = cols[0].get_text(strip=True)
-        transaction_date   = cols[1].get_text(strip=True)
-        owner              = cols[2].get_text(strip=True)
-        ticker             = cols[3].get_text(strip=True)
         asset_cell         = cols[4]
         additional_div     = asset_cell.find("div", class_="text-muted")
         
@@ -61,95 +120,411 @@ def scrape_transactions_for_ptr(session, headers, ptr_id):
         else:
             additional_info = ""
 
-        asset_name         = asset_cell.get_text(separator=" ", strip=True)
-        additional_info    = additional_div.get_text(separator=" ", strip=True) if additional_div else ""
-        asset_type         = cols[5].get_text(strip=True)
-        txn_type           = cols[6].get_text(strip=True)
-        raw_amount         = cols[7].get_text(strip=True)
-        amount             = normalize_amount_field_format(raw_amount)
-        comment            = cols[8].get_text(strip=True)
-        
-        try:
-            txn_num_int = int(transaction_number)
-        except ValueError:
-            txn_num_int = None
-        
-        transaction_tuple = (
+        transactions.append(build_transaction_tuple(
             ptr_id,
-            txn_num_int,
-            transaction_date,
-            owner,
-            ticker,
-            asset_name,
+            cols[0].get_text(strip=True),
+            cols[1].get_text(strip=True),
+            cols[2].get_text(strip=True),
+            cols[3].get_text(strip=True),
+            asset_cell.get_text(separator=" ", strip=True),
             additional_info,
-            asset_type,
-            txn_type,
-            amount,
-            comment
-        )
-        transactions.append(transaction_tuple)
+            cols[5].get_text(strip=True),
+            cols[6].get_text(strip=True),
+            cols[7].get_text(strip=True),
+            cols[8].get_text(strip=True)
+        ))
     
     return transactions
 
+def lxml_text(element, separator=""):
+    """
+    lxml equivalent of BeautifulSoup's get_text(separator=..., strip=True).
+    """
+    return separator.join(part for part in (text.strip() for text in element.itertext()) if part)
+
+def xpath_has_class(class_name):
+    return f'contains(concat(" ", normalize-space(@class), " "), " {class_name} ")'
+
+def parse_ptr_transactions_lxml(html, ptr_id):
+    """
+    Fast-path parser built on lxml. Produces exactly the same tuples as
+    parse_ptr_transactions_bs4 without building a BeautifulSoup tree.
+    """
+    # Encode to bytes so pages with an XML encoding declaration are accepted.
+    if isinstance(html, str):
+        html = html.encode("utf-8")
+    document = lxml_html.fromstring(html, parser=lxml_html.HTMLParser(encoding="utf-8"))
+    transactions = []
+
+    table_divs = document.xpath(f'//div[{xpath_has_class("table-responsive")}]')
+    if not table_divs:
+        logger.error(f"No table-responsive div found for ptr_id {ptr_id}")
+        return transactions
+
+    tables = table_divs[0].xpath(f'.//table[{xpath_has_class("table")}]')
+    if not tables:
+        logger.error(f"No table found in table-responsive div for ptr_id {ptr_id}")
+        return transactions
+
+    tbodies = tables[0].xpath('.//tbody')
+    if not tbodies:
+        logger.error(f"No tbody found for ptr_id {ptr_id}")
+        return transactions
+
+    for row in tbodies[0].xpath('.//tr'):
+        cols = row.xpath('.//td')
+        if len(cols) < 9:
+            continue  # Skip rows that don't have enough columns.
+
+        asset_cell = cols[4]
+        additional_divs = asset_cell.xpath(f'.//div[{xpath_has_class("text-muted")}]')
+        if additional_divs:
+            additional_info = lxml_text(additional_divs[0], " ")
+            # Empty the div rather than drop_tree(): dropping it would merge the text on
+            # either side into one string, where BeautifulSoup keeps them separate.
+            additional_divs[0].clear(keep_tail=True)
+        else:
+            additional_info = ""
+
+        transactions.append(build_transaction_tuple(
+            ptr_id,
+            lxml_text(cols[0]),
+            lxml_text(cols[1]),
+            lxml_text(cols[2]),
+            lxml_text(cols[3]),
+            lxml_text(asset_cell, " "),
+            additional_info,
+            lxml_text(cols[5]),
+            lxml_text(cols[6]),
+            lxml_text(cols[7]),
+            lxml_text(cols[8])
+        ))
+
+    return transactions
+
+def parse_ptr_transactions(html, ptr_id, parser=PTR_PARSER):
+    """
+    Parses a PTR page into transaction tuples with the configured engine ("lxml" or "bs4").
+    Falls back to BeautifulSoup when lxml is not installed or cannot parse the page.
+    """
+    if parser == "lxml" and lxml_html is not None:
+        try:
+            return parse_ptr_transactions_lxml(html, ptr_id)
+        except Exception as e:
+            logger.warning(f"lxml parser failed for ptr_id {ptr_id} ({e}); falling back to BeautifulSoup.")
+    return parse_ptr_transactions_bs4(html, ptr_id)
+
+def iter_saved_ptr_pages(directory=HTTP_CASSETTE_DIR, archive_dir=PTR_ARCHIVE_DIR):
+    """
+    Yields (ptr_id, html) for saved PTR pages: the latest version of every report in
+    the PTR archive (skipped when archive_dir is None), then plain <ptr_id>.html files
+    and PTR responses recorded by the HTTP cassette under directory.
+    """
+    if archive_dir:
+        yield from iter_archived_pages(archive_dir)
+    for root, _, files in os.walk(directory):
+        for name in sorted(files):
+            path = os.path.join(root, name)
+            if name.endswith(".html"):
+                with open(path, "r", encoding="utf-8") as f:
+                    yield name[:-len(".html")], f.read()
+            elif name.endswith(".json.gz"):
+                with gzip.open(path, "rt", encoding="utf-8") as f:
+                    record = json.load(f)
+                match = re.search(r"/search/view/ptr/([^/]+)/", record.get("url", ""))
+                if match and record.get("status") == 200:
+                    yield match.group(1), base64.b64decode(record["body"]).decode("utf-8", "replace")
+
+def check_ptr_parser_parity(pages=None):
+    """
+    Runs both parser engines over saved PTR pages and compares their tuples.
+    pages is an iterable of (ptr_id, html); defaults to iter_saved_ptr_pages()
+    (PTR archive plus cassette recordings).
+    Returns the list of ptr_ids whose output differs (empty means full parity).
+    """
+    if lxml_html is None:
+        logger.warning("lxml is not installed; nothing to compare.")
+        return []
+    mismatches = []
+    checked = 0
+    for ptr_id, html in (pages if pages is not None else iter_saved_ptr_pages()):
+        checked += 1
+        expected = parse_ptr_transactions_bs4(html, ptr_id)
+        try:
+            actual = parse_ptr_transactions_lxml(html, ptr_id)
+        except Exception as e:
+            actual = e
+        if actual != expected:
+            mismatches.append(ptr_id)
+            logger.error(f"Parser mismatch for ptr_id {ptr_id}: bs4={expected} lxml={actual}")
+    logger.info(f"Parser parity check: {checked - len(mismatches)} of {checked} pages identical.")
+    return mismatches
+
+# --- Scraping Function ---
+
+def ptr_host_throttle():
+    """
+    Per-host limits for PTR downloads, scaled by the number of egress proxies
+    (each proxy also enforces its own rate). Replayed cassettes are not paced.
+    """
+    egress = egress_count()
+    rate = None if cassette_replaying() else PTR_REQUESTS_PER_SECOND * egress
+    return HostThrottle(PTR_MAX_PER_HOST * egress, rate)
+
+def download_ptr_page(session, headers, ptr_id, throttle=None):
+    """
+    Downloads one PTR page and returns its HTML, or None on a non-200 status.
+    """
+    url = f"https://efdsearch.senate.gov/search/view/ptr/{ptr_id}/"
+    logger.debug(f"Downloading PTR page: {url}")
+    
+    if throttle is not None:
+        with throttle.slot(urlparse(url).netloc):
+            response = session.get(url, headers=headers)
+    else:
+        response = session.get(url, headers=headers)
+    if response.status_code != 200:
+        logger.error(f"Failed to retrieve {url}, status code {response.status_code}")
+        return None
+    return response.text
+
+def scrape_transactions_for_ptr(session, headers, ptr_id, throttle=None):
+    html = download_ptr_page(session, headers, ptr_id, throttle)
+    if html is None:
+        return None
+    return parse_ptr_transactions(html, ptr_id)
+
+def parse_ptr_page(ptr_id, html):
+    """
+    Parse-stage task. Module-level so ProcessPoolExecutor can pickle it; takes and
+    returns plain strings and tuples.
+    """
+    return parse_ptr_transactions(html, ptr_id)
+
+def parse_ptr_page_item(item):
+    """
+    parse_ptr_page for one (ptr_id, html) item; returns (ptr_id, transactions).
+    """
+    ptr_id, html = item
+    return ptr_id, parse_ptr_page(ptr_id, html)
+
+def create_parse_executor(parse_workers):
+    """
+    Process pool for the parse stage, or None when parse_workers is 0.
+    Workers are started with forkserver (spawn where it is unavailable): by the time
+    the pool starts, download threads, the DB writer and their locks are live, and a
+    forked child could inherit a lock held by one of them.
+    """
+    if parse_workers <= 0:
+        return None
+    start_method = "forkserver" if "forkserver" in multiprocessing.get_all_start_methods() else "spawn"
+    return ProcessPoolExecutor(max_workers=parse_workers, mp_context=multiprocessing.get_context(start_method))
+
+# Failures of the transport rather than of one report: the rest of the batch would fail
+# the same way, so fetch_ptr_transactions stops submitting downloads.
+BATCH_ABORTING_ERRORS = (CircuitOpenError, NoHealthyProxyError, DeadlineExceeded)
+
+def download_ptr_worker(session, headers, ptr_id, throttle):
+    """
+    Download-stage task. Returns None on a non-200 status; network errors propagate
+    to fetch_ptr_transactions. Successful pages are stored in the PTR archive for
+    later re-parsing.
+    """
+    html = download_ptr_page(session, headers, ptr_id, throttle)
+    if html is not None and PTR_ARCHIVE_ENABLED:
+        try:
+            archive_ptr_page(ptr_id, html)
+        except OSError as e:
+            logger.warning(f"Could not archive ptr_id {ptr_id}: {e}")
+    return html
+
+def fetch_ptr_transactions(session, headers, ptr_ids, workers=PTR_FETCH_WORKERS,
+                           parse_workers=PTR_PARSE_WORKERS, throttle=None):
+    """
+    Two-stage pipeline yielding (ptr_id, transactions) as each report finishes:
+      - download: a bounded thread pool sharing the session (and its cookies);
+        throttle applies the per-host concurrency limit and pacing.
+      - parse: downloaded HTML is handed to a ProcessPoolExecutor with parse_workers
+        processes, so parsing overlaps with downloading instead of adding to it.
+        parse_workers <= 0 parses on this thread instead.
+    transactions is None when efdsearch answered with a non-200 status. Reports whose
+    download raised a network error are not yielded at all, so their scrape status is
+    left alone; a circuit, proxy-pool or deadline error also stops submitting the rest
+    of the batch. At most 2 * (workers + parse_workers) reports are queued or in flight
+    across both stages.
+    """
+    pending_ids = iter(ptr_ids)
+    aborted = False
+    downloads = {}
+    parses = {}
+    max_in_flight = 2 * (max(1, workers) + max(0, parse_workers))
+    download_executor = ThreadPoolExecutor(max_workers=max(1, workers))
+    parse_executor = create_parse_executor(parse_workers)
+    try:
+        def submit_downloads():
+            while len(downloads) + len(parses) < max_in_flight:
+                ptr_id = next(pending_ids, None)
+                if ptr_id is None:
+                    return
+                downloads[download_executor.submit(download_ptr_worker, session, headers, ptr_id, throttle)] = ptr_id
+
+        submit_downloads()
+        while downloads or parses:
+            done, _ = wait(list(downloads) + list(parses), return_when=FIRST_COMPLETED)
+            for future in done:
+                if future in downloads:
+                    ptr_id = downloads.pop(future)
+                    try:
+                        html = future.result()
+                    except BATCH_ABORTING_ERRORS as e:
+                        if not aborted:
+                            logger.error(f"Stopping PTR downloads for this cycle: {e}")
+                            aborted = True
+                            pending_ids = iter(())  # submit_downloads has nothing left to submit.
+                        continue
+                    except requests.RequestException as e:
+                        logger.error(f"Failed to download ptr_id {ptr_id}: {e}")
+                        continue
+                    if html is None:
+                        yield ptr_id, None
+                    elif parse_executor is None:
+                        yield ptr_id, parse_ptr_page(ptr_id, html)
+                    else:
+                        parses[parse_executor.submit(parse_ptr_page, ptr_id, html)] = ptr_id
+                else:
+                    yield parses.pop(future), future.result()
+            submit_downloads()
+    finally:
+        download_executor.shutdown(wait=True, cancel_futures=True)
+        if parse_executor is not None:
+            parse_executor.shutdown(wait=True, cancel_futures=True)
+
+def next_ptr_retry_at(attempts, now=None):
+    """
+    Exponential retry schedule for reports that came back empty or failed:
+    PTR_RETRY_BASE_HOURS * 2**(attempts - 1), capped at PTR_RETRY_MAX_HOURS.
+    Returns None (never retry) once PTR_MAX_ATTEMPTS is reached.
+    """
+    if attempts >= PTR_MAX_ATTEMPTS:
+        return None
+    delay_hours = min(PTR_RETRY_MAX_HOURS, PTR_RETRY_BASE_HOURS * (2 ** (attempts - 1)))
+    return ((now or datetime.datetime.now()) + datetime.timedelta(hours=delay_hours)).strftime("%Y-%m-%d %H:%M:%S")
+
+def record_ptr_result(conn, ptr_id, transactions):
+    """
+    Stores the outcome of one report download in ptr_scrape_status (without committing).
+    """
+    attempts = get_ptr_scrape_attempts(conn, ptr_id) + 1
+    if transactions:
+        write_ptr_scrape_status(conn, ptr_id, attempts, "ok", len(transactions), None)
+        return
+    last_result = "error" if transactions is None else "empty"
+    next_retry_at = next_ptr_retry_at(attempts)
+    write_ptr_scrape_status(conn, ptr_id, attempts, last_result, 0, next_retry_at)
+    if next_retry_at is None:
+        logger.warning(f"Giving up on ptr_id {ptr_id} after {attempts} attempts (last result: {last_result}).")
+    else:
+        logger.info(f"ptr_id {ptr_id} was {last_result} (attempt {attempts}); next retry at {next_retry_at}.")
+
+def store_ptr_result(conn, ptr_id, transactions):
+    """
+    DbWriter item: a report's transactions together with its scrape status, so an
+    'ok' status is never committed without its rows. Returns the number of new rows.
+    """
+    inserted = write_transactions_batch(conn, transactions) if transactions else 0
+    record_ptr_result(conn, ptr_id, transactions)
+    if transactions:
+        logger.info(f"Found {len(transactions)} transactions for ptr_id {ptr_id}, {inserted} new.")
+    return inserted
+
 # --- Main Function ---
 
 def scrape_transactions():
-    # Optional: set proxy if needed
-    proxy = {"http": PROXY}
-    
-    # Create a persistent session.
-    session = requests.Session()
-    
-    # Prepare initial headers.
-    headers = {
-        'Accept': 'application/json, text/javascript, */*; q=0.01',
-        'Accept-Encoding': 'gzip, deflate, br, zstd',
-        'Accept-Language': 'en-US,en;q=0.9,pl;q=0.8',
-        'Connection': 'keep-alive',
-        'Content-Length': '1385',
-        'Content-Type': 'application/x-www-form-urlencoded; charset=UTF-8',
-        'Host': 'efdsearch.senate.gov',
-        'Origin': 'https://efdsearch.senate.gov',
-        'Referer': 'https://efdsearch.senate.gov/search/',
-        'Sec-Ch-Ua': '"Google Chrome";v="125", "Chromium";v="125", "Not.A/Brand";v="24"',
-        'Sec-Ch-Ua-Mobile': '?0',
-        'Sec-Ch-Ua-Platform': '"Windows"',
-        'Sec-Fetch-Dest': 'empty',
-        'Sec-Fetch-Mode': 'cors',
-        'Sec-Fetch-Site': 'same-origin',
-        'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/125.0.0.0 Safari/537.36',
-        'X-Csrftoken': 'placeholder'
-    }
-    headers = get_csrf_token(session, headers)
-    
-    # Accept the disclaimer to establish a valid session.
-    csrftoken, session_id, number_token = accept_disclaimer(session, proxy=proxy)
+    # Shared efdsearch session: reuses stored cookies and re-accepts the disclaimer only when needed.
+    session = get_efd_session()
     
-    # Prepare headers for PTR scraping using our established tokens.
     ptr_headers = {
         'Accept': 'text/html,application/xhtml+xml,application/xml;q=0.9,*/*;q=0.8',
-        'User-Agent': headers['User-Agent'],
-        'Cookie': f'csrftoken={csrftoken}; sessionid={session_id}; 33a5c6d97f299a223cb6fc3925909ef7={number_token}'
+        'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/125.0.0.0 Safari/537.36'
     }
     
     # Initialize the database and tables.
     conn = init_db()
     init_transactions_table(conn)
+    init_ptr_scrape_status_table(conn)
     
-    # Get the list of ptr_ids to process (only Online filings).
+    # Get the list of ptr_ids to process (Online filings never scraped or due for a retry).
     ptr_ids_to_scrape = get_filing_ptr_ids(conn)
     logger.info(f"Found {len(ptr_ids_to_scrape)} new filings to process.")
     
     total_new_transactions = 0
-    for ptr_id in ptr_ids_to_scrape:
-        transactions = scrape_transactions_for_ptr(session, ptr_headers, ptr_id)
-        logger.info(f"Found {len(transactions)} transactions for ptr_id {ptr_id}")
-        for txn in transactions:
-            insert_transaction(conn, txn)
-            total_new_transactions += 1
-        time.sleep(2)  # Be respectful to the server.
+    failed_ptr_ids = 0
+    throttle = ptr_host_throttle()
+    pages = fetch_ptr_transactions(session, ptr_headers, ptr_ids_to_scrape, throttle=throttle)
+    # Reports are committed in groups by the writer thread while downloads continue.
+    writer = DbWriter()
+    report_writes = []
+    try:
+        for ptr_id, transactions in pages:
+            if deadline_expired("scrape_transactions"):
+                # Queued downloads are cancelled; reports without transactions are picked up next cycle.
+                break
+            if transactions is None:
+                failed_ptr_ids += 1
+            report_writes.append((ptr_id, writer.submit(store_ptr_result, ptr_id, transactions)))
+    finally:
+        pages.close()
+        writer.close()
+
+    for ptr_id, report_write in report_writes:
+        try:
+            total_new_transactions += report_write.result()
+        except Exception as e:
+            # Rolled back as a whole; the report has no status change and is retried next cycle.
+            logger.error(f"Writing transactions for ptr_id {ptr_id} failed: {e}")
     
+    if failed_ptr_ids:
+        logger.warning(f"{failed_ptr_ids} PTR downloads returned an error status and are scheduled for retry.")
     logger.info(f"Inserted a total of {total_new_transactions} new transaction records.")
     conn.close()
 
-    return True if total_new_transactions else False
\ No newline at end of file
+    return True if total_new_transactions else False
+
+def reparse_archived_transactions(ptr_ids=None, parse_workers=PTR_PARSE_WORKERS):
+    """
+    Rebuilds transactions from the PTR archive without touching the network, e.g. after
+    a parser fix. Each report's rows are replaced atomically with the fresh parse;
+    reports that now parse to rows are marked 'ok' in ptr_scrape_status.
+    Returns the number of transaction rows written.
+    """
+    conn = init_db()
+    init_transactions_table(conn)
+    init_ptr_scrape_status_table(conn)
+
+    pages = iter_archived_pages(ptr_ids=ptr_ids)
+    executor = create_parse_executor(parse_workers)
+    reports = 0
+    total_rows = 0
+    try:
+        while True:
+            # Read the archive in batches so only a bounded number of pages is held in memory.
+            batch = list(islice(pages, max(1, parse_workers) * 16))
+            if not batch:
+                break
+            if executor is not None:
+                results = executor.map(parse_ptr_page_item, batch, chunksize=4)
+            else:
+                results = map(parse_ptr_page_item, batch)
+            for ptr_id, transactions in results:
+                reports += 1
+                if not transactions:
+                    logger.warning(f"Archived ptr_id {ptr_id} parsed to no transactions; existing rows kept.")
+                    continue
+                total_rows += replace_transactions_for_ptr(conn, ptr_id, transactions)
+                set_ptr_scrape_status(conn, ptr_id, get_ptr_scrape_attempts(conn, ptr_id), "ok", len(transactions), None)
+    finally:
+        if executor is not None:
+            executor.shutdown(wait=True, cancel_futures=True)
+    conn.close()
+    logger.info(f"Re-parsed {reports} archived reports into {total_rows} transaction rows.")
+    return total_rows
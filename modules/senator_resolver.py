@@ -0,0 +1,223 @@
+import re
+import logging
+import threading
+from collections import defaultdict
+from functools import partial
+from modules.config import ALIAS_AUTO_MATCH_CONFIDENCE
+from modules.db_helper import get_all_senator_aliases, write_alias_for_senator
+
+# Get the main_logger object
+logger = logging.getLogger("main_logger")
+
+# Tokens ignored when comparing names (generational suffixes, titles).
+NAME_SUFFIXES = {"JR", "SR", "II", "III", "IV", "V", "MD", "PHD", "DR", "MR", "MRS", "MS"}
+
+# A suggestion must beat the best candidate for any other senator by this margin to be auto-accepted.
+AMBIGUITY_MARGIN = 0.1
+
+# Names whose middle initials conflict are kept at least this far below auto-accept.
+MIDDLE_INITIAL_CONFLICT_MARGIN = 0.1
+
+def name_tokens(name):
+    """
+    Splits a name into upper-case tokens, dropping punctuation and suffixes like JR or III.
+    Example: "A. Mitchell McConnell, Jr." -> ["A", "MITCHELL", "MCCONNELL"]
+    """
+    tokens = re.findall(r"[A-Z0-9']+", name.upper())
+    return [token for token in tokens if token not in NAME_SUFFIXES]
+
+def name_trigrams(tokens):
+    """
+    Returns the set of character trigrams for the given tokens (each padded with spaces).
+    """
+    trigrams = set()
+    for token in tokens:
+        padded = f" {token} "
+        for i in range(len(padded) - 2):
+            trigrams.add(padded[i:i + 3])
+    return trigrams
+
+def token_containment(tokens_a, tokens_b):
+    """
+    Share of the shorter name's tokens found in the longer one.
+    A single-letter token (a middle initial) matches any token starting with that letter.
+    """
+    shorter, longer = sorted((tokens_a, tokens_b), key=len)
+    if not shorter:
+        return 0.0
+    matched = 0
+    for token in shorter:
+        if token in longer:
+            matched += 1
+        elif len(token) == 1 and any(other.startswith(token) for other in longer):
+            matched += 1
+        elif any(len(other) == 1 and token.startswith(other) for other in longer):
+            matched += 1
+    return matched / len(shorter)
+
+def middle_initials_conflict(tokens_a, tokens_b):
+    """
+    True when both names have middle names/initials and none of their first letters agree.
+    Example: "MARK K WARNER" and "MARK R WARNER" conflict; "MARK WARNER" conflicts with neither.
+    """
+    initials_a = {token[0] for token in tokens_a[1:-1]}
+    initials_b = {token[0] for token in tokens_b[1:-1]}
+    return bool(initials_a and initials_b) and not initials_a & initials_b
+
+def dice_similarity(set_a, set_b):
+    if not set_a or not set_b:
+        return 0.0
+    return 2 * len(set_a & set_b) / (len(set_a) + len(set_b))
+
+def name_confidence(tokens_a, tokens_b):
+    """
+    Confidence (0..1) that two tokenized names refer to the same person.
+    Combines token containment with trigram similarity, and is scaled down
+    when the last names differ so that e.g. "RICK SCOTT" never matches "TIM SCOTT".
+    Conflicting middle initials cap the score below ALIAS_AUTO_MATCH_CONFIDENCE, so
+    "MARK K WARNER" is only ever suggested for "MARK R WARNER", never auto-matched.
+    """
+    if not tokens_a or not tokens_b:
+        return 0.0
+    score = 0.6 * token_containment(tokens_a, tokens_b) + 0.4 * dice_similarity(
+        name_trigrams(tokens_a), name_trigrams(tokens_b)
+    )
+    if tokens_a[-1] != tokens_b[-1]:
+        score *= dice_similarity(name_trigrams([tokens_a[-1]]), name_trigrams([tokens_b[-1]]))
+    if middle_initials_conflict(tokens_a, tokens_b):
+        score = min(score, ALIAS_AUTO_MATCH_CONFIDENCE - MIDDLE_INITIAL_CONFLICT_MARGIN)
+    return score
+
+
+class SenatorAliasResolver:
+    """
+    In-memory view of senator_aliases, loaded once per scrape run.
+
+    resolve() is an O(1) exact lookup. suggest() uses a token index and a
+    character trigram index to rank likely senators for name variants that
+    are not on file yet (extra middle name, initials, suffixes).
+    Aliases learned by resolve_or_learn only enter the index once their write
+    has committed (see add_after_commit); the lock guards the index because that
+    can happen on the DB writer thread.
+    """
+
+    def __init__(self, aliases=()):
+        self.lock = threading.Lock()
+        self.exact = {}
+        self.aliases_by_senator = defaultdict(list)
+        self.token_index = defaultdict(set)
+        self.trigram_index = defaultdict(set)
+        for alias_name, senator_id in aliases:
+            self.add(alias_name, senator_id)
+
+    @classmethod
+    def from_db(cls, conn):
+        resolver = cls(get_all_senator_aliases(conn))
+        logger.debug(f"Loaded {len(resolver.exact)} senator aliases into the resolver.")
+        return resolver
+
+    def add(self, alias_name, senator_id):
+        """
+        Registers an alias in the exact map and both candidate indexes.
+        """
+        tokens = name_tokens(alias_name)
+        with self.lock:
+            if self.exact.get(alias_name) == senator_id:
+                return
+            self.exact[alias_name] = senator_id
+            self.aliases_by_senator[senator_id].append((alias_name, tokens))
+            for token in tokens:
+                if len(token) > 1:
+                    self.token_index[token].add(senator_id)
+            for trigram in name_trigrams(tokens):
+                self.trigram_index[trigram].add(senator_id)
+
+    def add_learned(self, learned):
+        """
+        Registers the {alias_name: senator_id} aliases collected by resolve_or_learn.
+        Call only after the transaction that wrote them has committed.
+        """
+        for alias_name, senator_id in learned.items():
+            self.add(alias_name, senator_id)
+
+    def add_after_commit(self, future, learned):
+        """
+        Registers `learned` once `future` (a DbWriter item that wrote them) succeeds;
+        a rolled-back item leaves the index untouched.
+        """
+        future.add_done_callback(partial(self._add_if_committed, learned))
+
+    def _add_if_committed(self, learned, future):
+        if not future.cancelled() and future.exception() is None:
+            self.add_learned(learned)
+
+    def resolve(self, alias_name):
+        """
+        Returns the senator_id for an alias already on file, else None.
+        """
+        return self.exact.get(alias_name)
+
+    def candidate_senator_ids(self, tokens, min_shared_trigrams=3):
+        candidates = set()
+        for token in tokens:
+            candidates |= self.token_index.get(token, set())
+        trigram_hits = defaultdict(int)
+        for trigram in name_trigrams(tokens):
+            for senator_id in self.trigram_index.get(trigram, ()):
+                trigram_hits[senator_id] += 1
+        candidates |= {senator_id for senator_id, hits in trigram_hits.items() if hits >= min_shared_trigrams}
+        return candidates
+
+    def suggest(self, alias_name, limit=3):
+        """
+        Returns up to `limit` (senator_id, confidence, matched_alias) tuples, best first.
+        """
+        tokens = name_tokens(alias_name)
+        suggestions = []
+        with self.lock:
+            for senator_id in self.candidate_senator_ids(tokens):
+                best = max(
+                    ((name_confidence(tokens, alias_tokens), known_alias)
+                     for known_alias, alias_tokens in self.aliases_by_senator[senator_id]),
+                    default=(0.0, None)
+                )
+                if best[1] is not None:
+                    suggestions.append((senator_id, round(best[0], 3), best[1]))
+        suggestions.sort(key=lambda s: s[1], reverse=True)
+        return suggestions[:limit]
+
+    def resolve_or_learn(self, conn, alias_name, learned=None, min_confidence=ALIAS_AUTO_MATCH_CONFIDENCE):
+        """
+        Resolves an alias exactly, or falls back to the fuzzy index. A confident,
+        unambiguous suggestion is stored via write_alias_for_senator and returned.
+        Returns None when the name still needs manual review.
+        The alias is written without committing; it lands with the caller's transaction.
+        It is recorded in the `learned` dict rather than the index: pass that dict to
+        add_learned/add_after_commit once the transaction has committed.
+        """
+        senator_id = self.resolve(alias_name)
+        if senator_id is None and learned:
+            senator_id = learned.get(alias_name)
+        if senator_id is not None:
+            return senator_id
+
+        suggestions = self.suggest(alias_name, limit=2)
+        if not suggestions:
+            return None
+        senator_id, confidence, matched_alias = suggestions[0]
+        runner_up = suggestions[1][1] if len(suggestions) > 1 else 0.0
+        if confidence < min_confidence or confidence - runner_up < AMBIGUITY_MARGIN:
+            logger.info(
+                f"No confident match for '{alias_name}': best was senator_id={senator_id} "
+                f"via '{matched_alias}' (confidence {confidence})."
+            )
+            return None
+
+        write_alias_for_senator(conn, senator_id, alias_name)
+        if learned is not None:
+            learned[alias_name] = senator_id
+        logger.info(
+            f"Auto-matched alias '{alias_name}' to senator_id={senator_id} "
+            f"via '{matched_alias}' (confidence {confidence})."
+        )
+        return senator_id
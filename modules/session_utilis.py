@@ -1,74 +1,223 @@
+import os
+import json
+import hashlib
+import logging
+import threading
+import requests
+from http.cookiejar import Cookie
+from urllib.parse import urlparse
 from bs4 import BeautifulSoup
+from modules.http_client import create_http_session
+from modules.http_cassette import CassetteAdapter, cassette_replaying
+from modules.proxy_pool import ProxyPool
+from modules.config import HTTP_CASSETTE_MODE, EFD_COOKIE_FILE, PROXY, PROXIES, USE_LEGACY_PROXY
 
-def get_csrf_token(session, headers):
+# Get the main_logger object
+logger = logging.getLogger("main_logger")
+
+EFD_HOME_URL = 'https://efdsearch.senate.gov/search/home/'
+
+EFD_USER_AGENT = 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/125.0.0.0 Safari/537.36'
+
+def create_session():
     """
-    Gets the CSRF token from a basic request and updates the headers.
+    Creates the requests session used by the efdsearch scrapers (pooled, retrying,
+    circuit-broken; see http_client). When HTTP_CASSETTE_MODE is "record" or "replay",
+    efdsearch traffic goes through the on-disk cassette.
     """
-    url = 'https://efdsearch.senate.gov/search/'
-    response = session.get(url)
-    if 'csrftoken' in response.cookies:
-        headers['X-Csrftoken'] = response.cookies['csrftoken']
-    return headers
+    session = create_http_session()
+    if HTTP_CASSETTE_MODE in ("record", "replay"):
+        session.mount("https://efdsearch.senate.gov/", CassetteAdapter())
+    return session
+
+class SessionExpiredError(requests.RequestException):
+    """Raised when efdsearch still rejects a request after re-authenticating."""
+
 
-def accept_disclaimer(session, proxy=None):
+class EfdSessionManager:
     """
-    Accepts the disclaimer on the home page and returns necessary tokens.
+    Owns the authenticated efdsearch session shared by both scrapers and all their workers.
+
+    - Cookies are persisted to cookie_path and reused across cycles, so the disclaimer
+      is only accepted when the stored session has actually expired.
+    - get()/post() mirror requests.Session. A response that bounces to the disclaimer
+      page (or a 403 from an expired CSRF token) triggers one re-authentication and a retry.
+    - Re-authentication is guarded by a lock and a generation counter: workers that saw
+      the same expired session wait for a single login instead of each starting one.
     """
-    initial_url = 'https://efdsearch.senate.gov/search/home/'
-    initial_response = session.get(initial_url, proxies=proxy)
-    
-    # Get tokens from cookies
-    if 'csrftoken' in initial_response.cookies:
-        csrftoken = initial_response.cookies['csrftoken']
-        number_token = initial_response.cookies.get('33a5c6d97f299a223cb6fc3925909ef7', '')
-    else:
-        csrftoken = ''
-        number_token = ''
-    
-    # Extract CSRF middleware token from the HTML
-    soup = BeautifulSoup(initial_response.text, 'html.parser')
-    csrf_input = soup.find('input', attrs={'name': 'csrfmiddlewaretoken'})
-    csrf_middlewaretoken = csrf_input['value'] if csrf_input else ''
-    
-    # Prepare headers for the disclaimer POST request
-    disclaimer_headers = {
-        'Accept': 'text/html,application/xhtml+xml,application/xml;q=0.9,image/avif,image/webp,image/apng,*/*;q=0.8,application/signed-exchange;v=b3;q=0.7',
-        'Accept-Encoding': 'gzip, deflate, br, zstd',
-        'Accept-Language': 'en-US,en;q=0.9',
-        'Cache-Control': 'max-age=0',
-        'Connection': 'keep-alive',
-        'Content-Length': '108',
-        'Content-Type': 'application/x-www-form-urlencoded',
-        'Cookie': f'csrftoken={csrftoken}; 33a5c6d97f299a223cb6fc3925909ef7={number_token}',
-        'Host': 'efdsearch.senate.gov',
-        'Origin': 'https://efdsearch.senate.gov',
-        'Referer': 'https://efdsearch.senate.gov/search/home/',
-        'Sec-Fetch-Dest': 'document',
-        'Sec-Fetch-Mode': 'navigate',
-        'Sec-Fetch-Site': 'same-origin',
-        'Sec-Fetch-User': '?1',
-        'Upgrade-Insecure-Requests': '1',
-        'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/125.0.0.0 Safari/537.36'
-    }
-    
-    disclaimer_payload = {
-        'prohibition_agreement': 1,
-        'csrfmiddlewaretoken': csrf_middlewaretoken,
-    }
-    
-    disclaimer_post_response = session.post(initial_url, data=disclaimer_payload, headers=disclaimer_headers, 
-                                              allow_redirects=False, proxies=proxy)
-    
-    if disclaimer_post_response.status_code == 302:
-        print("Disclaimer accepted. Session established successfully.")
-        # Try to extract a session id from the response headers if available.
-        if 'Set-Cookie' in disclaimer_post_response.headers:
-            set_cookie_header = disclaimer_post_response.headers['Set-Cookie']
-            # Adjust parsing based on how the cookie is formatted.
-            session_id = set_cookie_header.split(';')[0].replace('sessionid=', '')
+
+    def __init__(self, cookie_path=EFD_COOKIE_FILE, persist=None, proxy=None):
+        self.session = create_session()
+        self.proxy = proxy
+        if proxy:
+            self.session.proxies = {"http": proxy, "https": proxy}
+        self.cookie_path = cookie_path
+        # Cassette recordings must contain the login exchange, so only live runs reuse cookies.
+        self.persist = (HTTP_CASSETTE_MODE == "off") if persist is None else persist
+        self.generation = 0
+        self.lock = threading.Lock()
+        if self.persist:
+            self.load_cookies()
+
+    # --- Cookie persistence ---
+
+    def load_cookies(self):
+        if not self.cookie_path or not os.path.exists(self.cookie_path):
+            return
+        try:
+            with open(self.cookie_path, "r", encoding="utf-8") as f:
+                stored = json.load(f)
+        except (OSError, ValueError) as e:
+            logger.warning(f"Ignoring unreadable cookie file {self.cookie_path}: {e}")
+            return
+        for item in stored:
+            self.session.cookies.set_cookie(Cookie(
+                version=0, name=item["name"], value=item["value"], port=None, port_specified=False,
+                domain=item["domain"], domain_specified=bool(item["domain"]),
+                domain_initial_dot=item["domain"].startswith("."), path=item["path"], path_specified=True,
+                secure=item["secure"], expires=item["expires"], discard=False, comment=None,
+                comment_url=None, rest={"HttpOnly": None}
+            ))
+        self.session.cookies.clear_expired_cookies()
+        logger.debug(f"Loaded {len(self.session.cookies)} efdsearch cookies from {self.cookie_path}.")
+
+    def save_cookies(self):
+        if not self.persist or not self.cookie_path:
+            return
+        stored = [
+            {"name": c.name, "value": c.value, "domain": c.domain, "path": c.path,
+             "secure": c.secure, "expires": c.expires}
+            for c in self.session.cookies
+        ]
+        tmp_path = f"{self.cookie_path}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(stored, f)
+        os.replace(tmp_path, self.cookie_path)
+
+    # --- Authentication ---
+
+    def is_authenticated(self):
+        return self.session.cookies.get("sessionid") is not None
+
+    def csrf_token(self):
+        return self.session.cookies.get("csrftoken", "")
+
+    def authenticate(self):
+        """
+        Accepts the disclaimer on the home page, which establishes sessionid and csrftoken cookies.
+        """
+        home_response = self.session.get(EFD_HOME_URL, headers={'User-Agent': EFD_USER_AGENT})
+        soup = BeautifulSoup(home_response.text, 'html.parser')
+        csrf_input = soup.find('input', attrs={'name': 'csrfmiddlewaretoken'})
+        disclaimer_payload = {
+            'prohibition_agreement': 1,
+            'csrfmiddlewaretoken': csrf_input['value'] if csrf_input else '',
+        }
+        disclaimer_headers = {
+            'Accept': 'text/html,application/xhtml+xml,application/xml;q=0.9,*/*;q=0.8',
+            'Origin': 'https://efdsearch.senate.gov',
+            'Referer': EFD_HOME_URL,
+            'User-Agent': EFD_USER_AGENT
+        }
+        response = self.session.post(EFD_HOME_URL, data=disclaimer_payload, headers=disclaimer_headers,
+                                     allow_redirects=False)
+        self.generation += 1
+        if response.status_code == 302 and self.is_authenticated():
+            logger.info("Disclaimer accepted. efdsearch session established.")
+            self.save_cookies()
         else:
-            session_id = ''
-        return csrftoken, session_id, number_token
-    else:
-        print("Failed to accept disclaimer. Status code:", disclaimer_post_response.status_code)
-        return csrftoken, '', number_token
\ No newline at end of file
+            logger.error(f"Failed to accept disclaimer. Status code: {response.status_code}")
+
+    def ensure_authenticated(self):
+        with self.lock:
+            if not self.is_authenticated():
+                self.authenticate()
+
+    def reauthenticate(self, seen_generation):
+        """
+        Re-authenticates unless another worker already did so after seen_generation.
+        """
+        with self.lock:
+            if self.generation == seen_generation:
+                logger.info("efdsearch session expired; accepting the disclaimer again.")
+                self.session.cookies.clear()
+                self.authenticate()
+
+    @staticmethod
+    def session_expired(response):
+        """
+        True when efdsearch answered with the disclaimer instead of the requested page.
+        """
+        if response.status_code == 403:
+            return True
+        requested = urlparse(response.history[0].url if response.history else response.request.url).path
+        landed = urlparse(response.url).path
+        return landed.startswith('/search/home/') and not requested.startswith('/search/home/')
+
+    # --- Requests ---
+
+    def request(self, method, url, headers=None, **kwargs):
+        if not self.is_authenticated():
+            self.ensure_authenticated()
+        for attempt in range(2):
+            seen_generation = self.generation
+            request_headers = dict(headers or {})
+            if method.upper() == "POST":
+                request_headers['X-Csrftoken'] = self.csrf_token()
+            response = self.session.request(method, url, headers=request_headers, **kwargs)
+            if not self.session_expired(response):
+                return response
+            if attempt == 0:
+                self.reauthenticate(seen_generation)
+        raise SessionExpiredError(f"efdsearch rejected {method} {url} after re-authenticating.")
+
+    def get(self, url, **kwargs):
+        return self.request("GET", url, **kwargs)
+
+    def post(self, url, **kwargs):
+        return self.request("POST", url, **kwargs)
+
+
+def proxy_cookie_path(proxy, cookie_path=EFD_COOKIE_FILE):
+    """
+    Cookie file for the session behind one proxy, so each egress IP keeps its own login.
+    """
+    root, ext = os.path.splitext(cookie_path)
+    return f"{root}.{hashlib.sha1(proxy.encode('utf-8')).hexdigest()[:10]}{ext}"
+
+def proxy_display_name(proxy):
+    """
+    scheme://host:port of a proxy URL, without credentials, for logging.
+    """
+    parsed = urlparse(proxy)
+    return f"{parsed.scheme}://{parsed.hostname}" + (f":{parsed.port}" if parsed.port else "")
+
+def egress_count():
+    """
+    Number of egress IPs the scrapers spread requests over (1 without proxies).
+    """
+    return max(1, len(PROXIES))
+
+_efd_session = None
+_efd_session_lock = threading.Lock()
+
+def get_efd_session():
+    """
+    Returns the process-wide efdsearch client: a single EfdSessionManager, or a
+    ProxyPool of one manager per configured proxy. Both expose get()/post() and
+    log in lazily on first use.
+    """
+    global _efd_session
+    with _efd_session_lock:
+        if _efd_session is None:
+            if PROXIES:
+                _efd_session = ProxyPool(
+                    PROXIES, lambda proxy: EfdSessionManager(cookie_path=proxy_cookie_path(proxy), proxy=proxy)
+                )
+                logger.info(f"Using a pool of {len(PROXIES)} proxies for efdsearch: {', '.join(proxy_display_name(proxy) for proxy in PROXIES)}")
+            else:
+                if PROXY and not USE_LEGACY_PROXY:
+                    logger.warning("PROXY is set but ignored; list proxies in PROXIES (or set USE_LEGACY_PROXY=True).")
+                _efd_session = EfdSessionManager()
+                logger.info("Connecting to efdsearch directly (no proxies configured).")
+        return _efd_session
@@ -56,26 +56,30 @@ def normalize_amount_field_format(amount_str):
     
 import re
 
-def average_amount(amount_str):
+def parse_amount_range(amount_str):
     """
-    Given an amount range string in one of the expected formats, return the average value as an integer.
+    Parses an amount range string into integers (low, high, mid).
     Examples:
-      "$1,000,001-$5,000,000" returns (1000001 + 5000000) // 2
-      "$15,001-$50,000" returns (15001 + 50000) // 2
-      "Over $50,000,000" returns the numeric value after "Over" (or you could decide a different logic).
+      "$15,001-$50,000" returns (15001, 50000, 32500)
+      "Over $50,000,000" returns (50000000, None, 50000000), open-ended with mid at the lower bound
+      "$1,000" returns (1000, 1000, 1000)
+    Returns (None, None, None) if the string cannot be parsed.
     """
+    unparsed = (None, None, None)
+    if not amount_str:
+        return unparsed
     s = amount_str.strip()
-    # Handle "Over" case: we'll just remove "Over" and return the numeric part
+    # Handle "Over" case: remove "Over", then $ and commas
     if s.lower().startswith("over"):
-        # Remove the "Over" text, then remove $ and commas
         s = s[4:].strip()
         if s.startswith("$"):
             s = s[1:].strip()
         s = s.replace(",", "")
         try:
-            return int(s)
+            low = int(s)
         except ValueError:
-            return None
+            return unparsed
+        return low, None, low
     # Assume it's a range separated by a dash
     if "-" in s:
         parts = s.split("-")
@@ -85,16 +89,17 @@ def average_amount(amount_str):
             try:
                 low = int(low_str)
                 high = int(high_str)
-                return (low + high) // 2
+                return low, high, (low + high) // 2
             except ValueError:
-                return None
+                return unparsed
     # Otherwise, attempt to parse a single numeric value
     s = s.replace("$", "").replace(",", "").strip()
     try:
-        return int(s)
+        value = int(s)
     except ValueError:
-        return None
-    
+        return unparsed
+    return value, value, value
+
 import os
 
 def get_ignore_tickers(file_path="resources/ignore_tickers.txt"):
@@ -110,4 +115,15 @@ def get_ignore_tickers(file_path="resources/ignore_tickers.txt"):
         return ignore_tickers
     except FileNotFoundError:
         logger.warning(f"Ignore file not found: {full_path}. No tickers will be ignored.")
-        return []
\ No newline at end of file
+        return []
+import datetime
+
+def to_iso_date(date_str):
+    """
+    Converts a scraped MM/DD/YYYY date (e.g. "03/07/2024") to ISO "2024-03-07",
+    which sorts and compares correctly as text. Returns None if it cannot be parsed.
+    """
+    try:
+        return datetime.datetime.strptime(date_str.strip(), "%m/%d/%Y").date().isoformat()
+    except (AttributeError, ValueError):
+        return None
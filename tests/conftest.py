@@ -0,0 +1,19 @@
+import os
+import sys
+
+# modules.config reads these as ints at import time; tests never talk to Discord.
+for name in (
+    "DISCORD_BOT_GUILD_ID",
+    "DISCORD_BOT_DEV_CHANNEL_ID",
+    "DISCORD_BOT_CMD_CHANNEL_ID",
+    "DISCORD_VIP_CMD_CHANNEL_ID",
+    "SUBSCRIBE_VIP_ROLE_ID",
+    "SUBSCRIBE_LIFETIME_ROLE_ID",
+    "SUBSCRIBE_INFO_CHANNEL_ID",
+    "SCRIPT_FREQUENCY_SECONDS",
+    "MINIMUM_STOCK_TRANSACTIONS",
+):
+    os.environ.setdefault(name, "0")
+
+# Import modules.* from the repository root.
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
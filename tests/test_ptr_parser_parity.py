@@ -0,0 +1,32 @@
+import os
+
+from modules.ptr_archive import archive_ptr_page
+from modules.scraper_transactions import (
+    check_ptr_parser_parity,
+    iter_saved_ptr_pages,
+    parse_ptr_transactions_bs4,
+)
+
+FIXTURES_DIR = os.path.join(os.path.dirname(__file__), "fixtures", "ptr_pages")
+
+def fixture_pages():
+    return list(iter_saved_ptr_pages(directory=FIXTURES_DIR, archive_dir=None))
+
+def test_fixture_pages_are_parsed():
+    pages = fixture_pages()
+    assert len(pages) == 2
+    for ptr_id, html in pages:
+        assert parse_ptr_transactions_bs4(html, ptr_id)
+
+def test_parsers_agree_on_fixture_pages():
+    assert check_ptr_parser_parity(fixture_pages()) == []
+
+def test_saved_pages_include_the_archive(tmp_path):
+    ptr_id, html = fixture_pages()[0]
+    archive_ptr_page("archived-only", html, archive_dir=str(tmp_path))
+
+    pages = dict(iter_saved_ptr_pages(directory=FIXTURES_DIR, archive_dir=str(tmp_path)))
+
+    assert pages["archived-only"] == html
+    assert ptr_id in pages
+    assert check_ptr_parser_parity(pages.items()) == []